@@ -0,0 +1,134 @@
+"""
+Compare Postgres bulk-load paths: DataFrame.to_sql(method="multi") vs COPY ... FROM STDIN.
+Traffic goes through a local byte-counting TCP proxy, so bytes on the wire are reported
+alongside rows/second. Point it at a scratch database — it creates and drops a table.
+
+    python scripts/bench_db_load.py --rows 100000 [--database-url postgresql://...]
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import make_url
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+TABLE = "bench_forecasts_load"
+
+
+class CountingProxy:
+    """Forwards 127.0.0.1:<port> to the upstream Postgres and counts bytes each way."""
+
+    def __init__(self, upstream):
+        self.upstream = upstream  # (family, address)
+        self.sent = 0      # client -> server
+        self.received = 0  # server -> client
+        self._lock = threading.Lock()
+        self._listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.sent = self.received = 0
+
+    def _accept(self):
+        while True:
+            client, _ = self._listener.accept()
+            server = socket.socket(self.upstream[0], socket.SOCK_STREAM)
+            try:
+                server.connect(self.upstream[1])
+            except OSError as e:
+                print(f"proxy: cannot reach upstream {self.upstream[1]}: {e}", file=sys.stderr)
+                client.close()
+                server.close()
+                continue
+            threading.Thread(target=self._pipe, args=(client, server, "sent"), daemon=True).start()
+            threading.Thread(target=self._pipe, args=(server, client, "received"), daemon=True).start()
+
+    def _pipe(self, src, dst, counter):
+        try:
+            while chunk := src.recv(65536):
+                dst.sendall(chunk)
+                with self._lock:
+                    setattr(self, counter, getattr(self, counter) + len(chunk))
+        except OSError:
+            pass
+        finally:
+            for s in (src, dst):
+                try:
+                    s.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+def upstream_of(url):
+    host = url.query.get("host") or url.host or "localhost"
+    port = int(url.query.get("port") or url.port or 5432)
+    if host.startswith("/"):
+        return socket.AF_UNIX, os.path.join(host, f".s.PGSQL.{port}")
+    return socket.AF_INET, (host, port)
+
+
+def synthetic_forecasts(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    issue = pd.Timestamp.now(tz="UTC").floor("h")
+    horizons = rng.choice([1, 3, 6, 12, 24, 48, 72], n)
+    return pd.DataFrame({
+        "source": rng.choice(["open_meteo", "met_no", "openweather", "visual_crossing", "weather_gov"], n),
+        "lat": rng.uniform(-60, 60, n).round(4),
+        "lon": rng.uniform(-180, 180, n).round(4),
+        "variable": rng.choice(["temp_2m", "wind_speed_10m", "precipitation"], n),
+        "issue_time": issue,
+        "valid_time": issue + pd.to_timedelta(horizons, unit="h"),
+        "horizon_hours": horizons,
+        "value": rng.normal(15, 8, n),
+        "unit": "C",
+    })
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--database-url", default=os.getenv("DATABASE_URL", ""))
+    args = ap.parse_args()
+    if not args.database_url:
+        ap.error("--database-url or DATABASE_URL is required")
+
+    url = make_url(args.database_url)
+    proxy = CountingProxy(upstream_of(url))
+    query = {k: v for k, v in url.query.items() if k not in ("host", "port")}
+    proxied = url.set(host="127.0.0.1", port=proxy.port, query=query)
+    # db_utils reads DATABASE_URL from config at import time
+    os.environ["DATABASE_URL"] = proxied.render_as_string(hide_password=False)
+
+    from src.utils.db_utils import copy_dataframe, get_engine, insert_dataframe
+
+    df = synthetic_forecasts(args.rows)
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.exec_driver_sql(f"CREATE TABLE {TABLE} (LIKE forecasts INCLUDING DEFAULTS)")
+
+    print(f"{'method':<12} {'rows/s':>10} {'sent MB':>9} {'recv MB':>9} {'bytes/row':>10}")
+    try:
+        for name, load in (("to_sql", insert_dataframe), ("copy", copy_dataframe)):
+            with get_engine().begin() as conn:
+                conn.exec_driver_sql(f"TRUNCATE {TABLE}")
+            proxy.reset()
+            started = time.perf_counter()
+            load(df, TABLE)
+            elapsed = time.perf_counter() - started
+            sent, received = proxy.sent, proxy.received
+            print(f"{name:<12} {args.rows / elapsed:>10.0f} {sent / 1e6:>9.2f} {received / 1e6:>9.2f} {(sent + received) / args.rows:>10.1f}")
+    finally:
+        with get_engine().begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Peak Python memory (tracemalloc) of build_features with untyped reads (object strings,
+float64 values) vs typed reads (TYPED_FRAMES: categoricals, float32, int16 horizons).
+Also prints the memory of the same forecast/observation windows read whole, untyped vs
+typed. Loads a synthetic week of hourly observations and 6-hourly vendor runs for
+--locations points into a scratch schema (created and dropped) of the given database.
+
+    python scripts/bench_features_memory.py --locations 500 [--database-url postgresql://...]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import make_url
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+SCHEMA = "bench_features"
+VENDORS = ["open_meteo", "met_no", "openweather", "visual_crossing", "weather_gov"]
+WINDOW_FORECASTS_SQL = "SELECT * FROM forecasts WHERE variable = :variable AND valid_time >= now() - interval '24 hours'"
+WINDOW_OBSERVATIONS_SQL = "SELECT * FROM observations WHERE variable = :variable AND obs_time >= now() - interval '48 hours'"
+DDL = f"""
+CREATE TABLE {SCHEMA}.forecasts (
+  source TEXT NOT NULL, lat DOUBLE PRECISION NOT NULL, lon DOUBLE PRECISION NOT NULL,
+  variable TEXT NOT NULL, issue_time TIMESTAMPTZ NOT NULL, valid_time TIMESTAMPTZ NOT NULL,
+  horizon_hours INT NOT NULL, value DOUBLE PRECISION NOT NULL, unit TEXT NOT NULL
+);
+CREATE TABLE {SCHEMA}.observations (
+  station_id TEXT, lat DOUBLE PRECISION NOT NULL, lon DOUBLE PRECISION NOT NULL,
+  variable TEXT NOT NULL, obs_time TIMESTAMPTZ NOT NULL, value DOUBLE PRECISION NOT NULL,
+  unit TEXT NOT NULL, source TEXT NOT NULL
+)
+"""
+
+
+def synthetic_week(locations: int, horizons: list[int], variable: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(25, 60, locations).round(4)
+    lon = rng.uniform(-125, 30, locations).round(4)
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    hours = pd.date_range(now - pd.Timedelta(days=7), now, freq="h")
+    runs = pd.date_range(now - pd.Timedelta(days=7), now, freq="6h")
+
+    loc, t = np.meshgrid(np.arange(locations), np.arange(len(hours)), indexing="ij")
+    obs = pd.DataFrame({
+        "station_id": None,
+        "lat": lat[loc.ravel()],
+        "lon": lon[loc.ravel()],
+        "variable": variable,
+        "obs_time": hours[t.ravel()],
+        "value": rng.normal(12, 6, loc.size),
+        "unit": "C",
+        "source": "meteostat",
+    })
+
+    src, loc, run, h = (a.ravel() for a in np.meshgrid(
+        np.arange(len(VENDORS)), np.arange(locations), np.arange(len(runs)), np.asarray(horizons), indexing="ij"))
+    issue = runs[run]
+    fc = pd.DataFrame({
+        "source": np.asarray(VENDORS)[src],
+        "lat": lat[loc],
+        "lon": lon[loc],
+        "variable": variable,
+        "issue_time": issue,
+        "valid_time": issue + pd.to_timedelta(h, unit="h"),
+        "horizon_hours": h,
+        "value": rng.normal(12, 6, src.size),
+        "unit": "C",
+    })
+    return fc, obs
+
+
+def measure(build, typed: bool) -> tuple[float, float, int, float]:
+    from src.config import CFG
+    from src.model import features
+    # CFG is frozen; features reads the switch through its own module reference
+    features.CFG = replace(CFG, TYPED_FRAMES=typed)
+    tracemalloc.start()
+    started = time.perf_counter()
+    Xy = build()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, Xy.memory_usage(deep=True).sum() / 1e6, len(Xy), elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--locations", type=int, default=500)
+    ap.add_argument("--variable", default="temp_2m")
+    ap.add_argument("--horizon", type=int, default=24)
+    ap.add_argument("--database-url", default=os.getenv("DATABASE_URL", ""))
+    args = ap.parse_args()
+    if not args.database_url:
+        ap.error("--database-url or DATABASE_URL is required")
+
+    # config reads DATABASE_URL at import time; unqualified names resolve to the scratch schema
+    url = make_url(args.database_url)
+    os.environ["DATABASE_URL"] = url.update_query_dict({"options": f"-csearch_path={SCHEMA}"}).render_as_string(hide_password=False)
+
+    from src.config import CFG
+    from src.model.features import build_features
+    from src.utils.db_utils import apply_schema, copy_dataframe, fetch_df, get_engine
+
+    fc, obs = synthetic_week(args.locations, CFG.HORIZONS_HOURS, args.variable)
+    with get_engine().begin() as conn:
+        conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.exec_driver_sql(f"CREATE SCHEMA {SCHEMA}")
+        conn.exec_driver_sql(DDL)
+    try:
+        copy_dataframe(fc, "forecasts")
+        copy_dataframe(obs, "observations")
+        print(f"{len(fc)} forecast and {len(obs)} observation rows for {args.locations} locations")
+        del fc, obs
+
+        build = lambda: build_features(args.variable, args.horizon)
+        build()  # warm-up: imports, connection pool, compiled statements
+        print(f"{'reads':<10} {'peak MB':>9} {'result MB':>10} {'rows':>8} {'seconds':>8}")
+        for name, typed in (("untyped", False), ("typed", True)):
+            peak, result, rows, elapsed = measure(build, typed)
+            print(f"{name:<10} {peak:>9.1f} {result:>10.1f} {rows:>8} {elapsed:>8.2f}")
+
+        # the same window read whole: what a typed frame saves per row once it is held
+        print(f"\n{'frame':<14} {'rows':>8} {'untyped MB':>11} {'typed MB':>9}")
+        for table, sql in (("forecasts", WINDOW_FORECASTS_SQL), ("observations", WINDOW_OBSERVATIONS_SQL)):
+            untyped = fetch_df(sql, {"variable": args.variable})
+            typed = apply_schema(untyped.copy())
+            print(f"{table:<14} {len(untyped):>8} {untyped.memory_usage(deep=True).sum() / 1e6:>11.1f} {typed.memory_usage(deep=True).sum() / 1e6:>9.1f}")
+    finally:
+        with get_engine().begin() as conn:
+            conn.exec_driver_sql(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+
+
+if __name__ == "__main__":
+    main()
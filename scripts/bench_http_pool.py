@@ -0,0 +1,82 @@
+"""
+Benchmark HTTP requests/second against a local stub server, with and without
+the pooled keep-alive session from src/utils/http_utils.py.
+
+    python scripts/bench_http_pool.py --requests 2000 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.utils.http_utils import get_session
+
+# Roughly the size of one Open-Meteo 5-day hourly response
+PAYLOAD = json.dumps({
+    "hourly": {
+        "time": [f"2025-01-01T{h % 24:02d}:00" for h in range(120)],
+        "temperature_2m": [20.5] * 120,
+        "wind_speed_10m": [3.2] * 120,
+        "precipitation": [0.0] * 120,
+    }
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label: str, get, url: str, n: int, workers: int) -> float:
+    def one(_):
+        resp = get(url, timeout=10)
+        resp.raise_for_status()
+        resp.json()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(n)))
+    elapsed = time.perf_counter() - started
+    rps = n / elapsed
+    print(f"{label:<22} {n:>6} requests  {elapsed:7.2f}s  {rps:9.1f} req/s")
+    return rps
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/forecast"
+
+    try:
+        unpooled = run("requests.get", requests.get, url, args.requests, args.workers)
+        pooled = run("pooled session", get_session().get, url, args.requests, args.workers)
+    finally:
+        server.shutdown()
+    print(f"speed-up: {pooled / unpooled:.2f}x (TLS endpoints gain more: the handshake is skipped too)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark the vendor response parsers in src/etl (rows/second per vendor).
+Uses recorded payloads from --payload-dir ({vendor}.json, e.g. saved get_json output)
+when present, otherwise synthetic 5-day hourly payloads shaped like each vendor's API.
+
+    python scripts/bench_parsers.py --iterations 200 [--payload-dir recordings/]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import CFG
+from src.etl.ingest_met_no import parse_met_no
+from src.etl.ingest_open_meteo import parse_open_meteo
+from src.etl.ingest_openweather import parse_openweather
+from src.etl.ingest_visual_crossing import parse_visual_crossing
+from src.etl.ingest_weather_gov import parse_weather_gov
+from src.utils.time_utils import floor_hour, now_utc
+
+VARIABLES = ["temp_2m", "wind_speed_10m", "precipitation"]
+HOURS = 120
+
+
+def synthetic_payloads(start) -> dict[str, dict]:
+    steps = [start + timedelta(hours=h) for h in range(HOURS)]
+    return {
+        "open_meteo": {"hourly": {
+            "time": [t.strftime("%Y-%m-%dT%H:%M") for t in steps],
+            "temperature_2m": [20.0 + h % 7 for h in range(HOURS)],
+            "wind_speed_10m": [3.0 + h % 5 for h in range(HOURS)],
+            "precipitation": [0.1 * (h % 3) for h in range(HOURS)],
+        }},
+        "met_no": {"properties": {"timeseries": [{
+            "time": t.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "data": {
+                "instant": {"details": {"air_temperature": 20.0, "wind_speed": 3.0}},
+                "next_1_hours": {"details": {"precipitation_amount": 0.2}},
+            },
+        } for t in steps]}},
+        "openweather": {"list": [{
+            "dt": int(t.timestamp()),
+            "main": {"temp": 20.0}, "wind": {"speed": 3.0}, "rain": {"3h": 0.5},
+        } for t in steps[::3]]},
+        "visual_crossing": {"days": [{"hours": [{
+            "datetimeEpoch": int(t.timestamp()), "temp": 20.0, "wspd": 11.0, "precip": 0.0,
+        } for t in steps[d * 24:(d + 1) * 24]]} for d in range(HOURS // 24)]},
+        "weather_gov": {"properties": {
+            "temperature": {"uom": "wmoUnit:degC", "values": [
+                {"validTime": t.isoformat() + "/PT1H", "value": 20.0} for t in steps]},
+            "windSpeed": {"uom": "wmoUnit:km_h-1", "values": [
+                {"validTime": t.isoformat() + "/PT1H", "value": 11.0} for t in steps]},
+            "quantitativePrecipitation": {"uom": "wmoUnit:mm", "values": [
+                {"validTime": t.isoformat() + "/PT6H", "value": 1.2} for t in steps[::6]]},
+        }},
+    }
+
+
+PARSERS = {
+    "open_meteo": parse_open_meteo,
+    "met_no": parse_met_no,
+    "openweather": parse_openweather,
+    "visual_crossing": parse_visual_crossing,
+    "weather_gov": parse_weather_gov,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--payload-dir", default=None)
+    ap.add_argument("--all-horizons", action="store_true", help="skip the HORIZONS_HOURS filter")
+    args = ap.parse_args()
+
+    issue = floor_hour(now_utc())
+    payloads = synthetic_payloads(issue)
+    if args.payload_dir:
+        for vendor in PARSERS:
+            path = os.path.join(args.payload_dir, f"{vendor}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    payloads[vendor] = json.load(f)
+    horizons = None if args.all_horizons else CFG.HORIZONS_HOURS
+
+    print(f"{'vendor':<16} {'rows/call':>9} {'calls/s':>9} {'rows/s':>11}")
+    for vendor, parse in PARSERS.items():
+        data = payloads[vendor]
+        rows = len(parse(data, 40.0, -75.0, VARIABLES, issue, horizons))
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            parse(data, 40.0, -75.0, VARIABLES, issue, horizons)
+        elapsed = time.perf_counter() - started
+        calls = args.iterations / elapsed
+        print(f"{vendor:<16} {rows:>9} {calls:>9.1f} {rows * calls:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,14 @@ CREATE TABLE IF NOT EXISTS locations (
     lon DOUBLE PRECISION NOT NULL,
     created_at TIMESTAMPTZ DEFAULT now()
 );
+CREATE UNIQUE INDEX IF NOT EXISTS idx_locations_lat_lon ON locations(lat, lon);
 """
 
-INSERT_SQL = "INSERT INTO locations (name, lat, lon) VALUES (:name, :lat, :lon)"
+# Re-seeding renames in place; lat/lon is unique (see src/db/schema.sql)
+INSERT_SQL = """
+INSERT INTO locations (name, lat, lon) VALUES (:name, :lat, :lon)
+ON CONFLICT (lat, lon) DO UPDATE SET name = EXCLUDED.name
+"""
 
 def main() -> None:
     # Ensure we have locations configured
@@ -34,17 +34,66 @@ class Config:
     VARIABLES: list[str] = field(default_factory=lambda: _json_env("VARIABLES", ["temp_2m","wind_speed_10m","precipitation"]))
     HORIZONS_HOURS: list[int] = field(default_factory=lambda: _json_env("HORIZONS_HOURS", [1,3,6,12,24,48,72]))
 
+    # weather.gov lat/lon -> gridpoint mappings older than this are refreshed in the background
+    NWS_GRID_TTL_DAYS: int = int(os.getenv("NWS_GRID_TTL_DAYS", "30"))
+
     LOCAL_TIMEZONE: str = os.getenv("LOCAL_TIMEZONE", "Africa/Johannesburg")
 
     REQUESTS_CONCURRENCY: int = int(os.getenv("REQUESTS_CONCURRENCY", "4"))
+    # Per-vendor overrides of REQUESTS_CONCURRENCY, e.g. {"met_no": 8, "openweather": 2}
+    VENDOR_CONCURRENCY: dict[str, int] = field(default_factory=lambda: _json_env("VENDOR_CONCURRENCY", {}))
     REQUESTS_TIMEOUT: int = int(os.getenv("REQUESTS_TIMEOUT", "30"))
     REQUESTS_CACHE_TTL_SECONDS: int = int(os.getenv("REQUESTS_CACHE_TTL_SECONDS", "600"))
+    # "ttl": fixed REQUESTS_CACHE_TTL_SECONDS; "http": honour Expires/ETag/Last-Modified with revalidation
+    REQUESTS_CACHE_MODE: str = os.getenv("REQUESTS_CACHE_MODE", "ttl").lower()
+    REQUESTS_CACHE_PATH: str = os.getenv("REQUESTS_CACHE_PATH", os.path.join(".cache", "http.sqlite3"))
+    REQUESTS_CACHE_MAX_MB: int = int(os.getenv("REQUESTS_CACHE_MAX_MB", "256"))
+    # Client-side rate limits per host: requests/minute, or {"per_minute": n, "burst": b}
+    HOST_RATE_LIMITS: dict = field(default_factory=lambda: _json_env("HOST_RATE_LIMITS", {
+        "api.openweathermap.org": {"per_minute": 60, "burst": 5},
+        "api.met.no": {"per_minute": 1200, "burst": 20},
+    }))
+    # Open a host's circuit after this many consecutive failures, for this many seconds
+    CIRCUIT_BREAKER_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_COOLDOWN_SECONDS: int = int(os.getenv("CIRCUIT_BREAKER_COOLDOWN_SECONDS", "300"))
+    # Shared HTTP session: number of per-host pools kept, and keep-alive connections per host
+    HTTP_POOL_CONNECTIONS: int = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+    # Opt-in fetch_df result cache (memory + Parquet files) for queries that pass a ttl
+    QUERY_CACHE: bool = os.getenv("QUERY_CACHE", "false").lower() in ("1", "true", "yes")
+    QUERY_CACHE_DIR: str = os.getenv("QUERY_CACHE_DIR", os.path.join(".cache", "queries"))
+    QUERY_CACHE_MAX_MB: int = int(os.getenv("QUERY_CACHE_MAX_MB", "128"))
+    QUERY_CACHE_MEMORY_ENTRIES: int = int(os.getenv("QUERY_CACHE_MEMORY_ENTRIES", "64"))
+
+    # Skip re-inserting a vendor/location whose forecast series is unchanged since the last stored run
+    FORECAST_DEDUP: bool = os.getenv("FORECAST_DEDUP", "true").lower() in ("1", "true", "yes")
+    # Forecast rows buffered before each write while fetches are still in flight
+    FORECAST_BATCH_ROWS: int = int(os.getenv("FORECAST_BATCH_ROWS", "5000"))
+
+    # Rows per chunk for streamed reads (db_utils.iter_df)
+    STREAM_CHUNK_ROWS: int = int(os.getenv("STREAM_CHUNK_ROWS", "50000"))
+    # Feature reads map known columns to categorical / float32 / int16 (db_utils.SCHEMA_DTYPES)
+    TYPED_FRAMES: bool = os.getenv("TYPED_FRAMES", "true").lower() in ("1", "true", "yes")
+    # "pandas" (default) or "sql": build the feature matrix inside Postgres (src/model/features_sql.py)
+    FEATURE_BUILDER: str = os.getenv("FEATURE_BUILDER", "pandas").lower()
+
+    # "wide" (original tables) or "compact" (int-keyed fact tables; run src/db/compact_layout.sql first)
+    STORAGE_LAYOUT: str = os.getenv("STORAGE_LAYOUT", "wide").lower()
 
     # Data retention (days) — keep within Neon free-tier limits (~0.5 GB)
     FORECAST_RETENTION_DAYS: int = int(os.getenv("FORECAST_RETENTION_DAYS", "14"))
     OBSERVATION_RETENTION_DAYS: int = int(os.getenv("OBSERVATION_RETENTION_DAYS", "90"))
     ERROR_RETENTION_DAYS: int = int(os.getenv("ERROR_RETENTION_DAYS", "90"))
     PRUNE_BATCH_SIZE: int = int(os.getenv("PRUNE_BATCH_SIZE", "5000"))
+    # Pause between prune batches so hourly jobs aren't starved of the shared compute
+    PRUNE_THROTTLE_SECONDS: float = float(os.getenv("PRUNE_THROTTLE_SECONDS", "0.2"))
+    # Estimated Neon transfer per UTC day after which LOW_PRIORITY_JOBS skip (0 = no budget);
+    # keeps headroom in the monthly quota for the hourly ETL / predict jobs
+    DAILY_TRANSFER_BUDGET_MB: int = int(os.getenv("DAILY_TRANSFER_BUDGET_MB", "150"))
+    LOW_PRIORITY_JOBS: list[str] = field(default_factory=lambda: _json_env("LOW_PRIORITY_JOBS", ["export_dashboard", "monitor_hourly"]))
+    # Daily partitions created ahead of today on partitioned tables (src/db/partitions.py)
+    PARTITION_DAYS_AHEAD: int = int(os.getenv("PARTITION_DAYS_AHEAD", "7"))
 
 CFG = Config()
 
@@ -0,0 +1,115 @@
+-- Opt-in compact storage layout (set STORAGE_LAYOUT=compact after running this once).
+-- Fact rows keep small integer keys into sources / variables / locations, REAL values and no
+-- per-row id, unit or created_at; the unit is derived from the variable. `forecasts` and
+-- `observations` become read-only views with the original columns, so readers are unchanged
+-- and writers go through src/db/storage.py.
+--
+--   psql "$DATABASE_URL" -f src/db/schema.sql
+--   psql "$DATABASE_URL" -f src/db/compact_layout.sql
+--
+-- Existing rows are copied across and the wide tables are kept as forecasts_wide /
+-- observations_wide; drop them once the migration is verified to reclaim the space.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS sources (
+  id SMALLSERIAL PRIMARY KEY,
+  name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS variables (
+  id SMALLSERIAL PRIMARY KEY,
+  name TEXT NOT NULL UNIQUE,
+  unit TEXT NOT NULL                 -- canonical unit (src/config.py UNIT_MAP)
+);
+
+INSERT INTO variables (name, unit) VALUES
+  ('temp_2m', 'C'), ('wind_speed_10m', 'm/s'), ('precipitation', 'mm')
+ON CONFLICT (name) DO NOTHING;
+
+-- Columns ordered widest first so rows pack without alignment padding
+CREATE TABLE IF NOT EXISTS forecast_values (
+  issue_time TIMESTAMPTZ NOT NULL,
+  valid_time TIMESTAMPTZ NOT NULL,
+  location_id INT NOT NULL REFERENCES locations(id),
+  value REAL NOT NULL,
+  horizon_hours SMALLINT NOT NULL,
+  source_id SMALLINT NOT NULL REFERENCES sources(id),
+  variable_id SMALLINT NOT NULL REFERENCES variables(id)
+);
+
+CREATE TABLE IF NOT EXISTS observation_values (
+  obs_time TIMESTAMPTZ NOT NULL,
+  location_id INT NOT NULL REFERENCES locations(id),
+  value REAL NOT NULL,
+  source_id SMALLINT NOT NULL REFERENCES sources(id),
+  variable_id SMALLINT NOT NULL REFERENCES variables(id),
+  station_id TEXT
+);
+
+DO $$
+BEGIN
+  -- Move existing rows only while forecasts/observations are still the wide tables
+  IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('forecasts')) IN ('r', 'p') THEN
+    INSERT INTO sources (name)
+    SELECT DISTINCT source FROM forecasts
+    UNION SELECT DISTINCT source FROM observations
+    ON CONFLICT (name) DO NOTHING;
+
+    INSERT INTO variables (name, unit)
+    SELECT variable, MIN(unit) FROM (
+      SELECT variable, unit FROM forecasts UNION SELECT variable, unit FROM observations
+    ) u GROUP BY variable
+    ON CONFLICT (name) DO NOTHING;
+
+    INSERT INTO locations (name, lat, lon)
+    SELECT DISTINCT lat::text || ',' || lon::text, lat, lon FROM (
+      SELECT lat, lon FROM forecasts UNION SELECT lat, lon FROM observations
+    ) p
+    ON CONFLICT (lat, lon) DO NOTHING;
+
+    INSERT INTO forecast_values (issue_time, valid_time, location_id, value, horizon_hours, source_id, variable_id)
+    SELECT f.issue_time, f.valid_time, l.id, f.value, f.horizon_hours, s.id, v.id
+    FROM forecasts f
+    JOIN locations l ON l.lat = f.lat AND l.lon = f.lon
+    JOIN sources s ON s.name = f.source
+    JOIN variables v ON v.name = f.variable;
+
+    INSERT INTO observation_values (obs_time, location_id, value, source_id, variable_id, station_id)
+    SELECT o.obs_time, l.id, o.value, s.id, v.id, o.station_id
+    FROM observations o
+    JOIN locations l ON l.lat = o.lat AND l.lon = o.lon
+    JOIN sources s ON s.name = o.source
+    JOIN variables v ON v.name = o.variable;
+
+    ALTER TABLE forecasts RENAME TO forecasts_wide;
+    ALTER TABLE observations RENAME TO observations_wide;
+  END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_forecast_values_valid_time ON forecast_values(valid_time);
+CREATE INDEX IF NOT EXISTS idx_forecast_values_var_src_time ON forecast_values(variable_id, source_id, valid_time);
+CREATE INDEX IF NOT EXISTS idx_observation_values_obs_time ON observation_values(obs_time);
+-- Also the ON CONFLICT target for observation dedup inserts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_observation_values_unique
+  ON observation_values(location_id, variable_id, obs_time, source_id);
+
+-- Compatibility views: same columns as the wide tables (minus id/created_at)
+CREATE OR REPLACE VIEW forecasts AS
+SELECT s.name AS source, l.lat, l.lon, v.name AS variable,
+       f.issue_time, f.valid_time, f.horizon_hours::int AS horizon_hours,
+       f.value::double precision AS value, v.unit
+FROM forecast_values f
+JOIN sources s ON s.id = f.source_id
+JOIN locations l ON l.id = f.location_id
+JOIN variables v ON v.id = f.variable_id;
+
+CREATE OR REPLACE VIEW observations AS
+SELECT o.station_id, l.lat, l.lon, v.name AS variable, o.obs_time,
+       o.value::double precision AS value, v.unit, s.name AS source
+FROM observation_values o
+JOIN sources s ON s.id = o.source_id
+JOIN locations l ON l.id = o.location_id
+JOIN variables v ON v.id = o.variable_id;
+
+COMMIT;
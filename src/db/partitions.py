@@ -0,0 +1,178 @@
+"""
+Daily range partitioning for the time-series tables, with partition-drop retention.
+Partitions are named <table>_pYYYYMMDD and cover [day, day + 1) of the table's time column;
+a <table>_default partition catches rows outside the created range until the next
+ensure_partitions run moves them into their day. Expired days are detached and dropped
+whole, so retention leaves no dead tuples or index bloat behind.
+
+Converting an existing table is opt-in and rewrites it once:
+
+    python -m src.db.partitions --convert forecasts observations errors
+"""
+import argparse
+import re
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from src.config import CFG
+from src.db.storage import physical_table
+from src.utils.db_utils import db_conn
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# logical table -> partition key
+PARTITION_KEYS = {
+    "forecasts": "valid_time",
+    "observations": "obs_time",
+    "errors": "valid_time",
+}
+
+_DAY_SUFFIX = re.compile(r"_p(\d{8})$")
+
+
+def partition_name(table: str, day: date) -> str:
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table}).scalar()
+    return kind == "p"
+
+
+def daily_partitions(conn: Connection, table: str) -> dict[date, str]:
+    """Existing day partitions of table, by day."""
+    rows = conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:t)"),
+        {"t": table},
+    )
+    out = {}
+    for (name,) in rows:
+        m = _DAY_SUFFIX.search(name)
+        if m:
+            out[datetime.strptime(m.group(1), "%Y%m%d").date()] = name
+    return out
+
+
+def _create_day(conn: Connection, table: str, key: str, day: date) -> None:
+    # Built standalone and attached, so rows that landed in the default partition for this
+    # day can be moved in first (attaching over them would fail)
+    name = partition_name(table, day)
+    lo, hi = datetime.combine(day, datetime.min.time(), timezone.utc), datetime.combine(day + timedelta(days=1), datetime.min.time(), timezone.utc)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(f"WITH moved AS (DELETE FROM {table}_default WHERE {key} >= :lo AND {key} < :hi RETURNING *) "
+             f"INSERT INTO {name} SELECT * FROM moved"),
+        {"lo": lo, "hi": hi},
+    )
+    # exec_driver_sql: the bound literals contain ":00", which text() would read as bind params
+    conn.exec_driver_sql(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')")
+
+
+def ensure_partitions(conn: Connection, table: str, key: str, start: date, end: date) -> int:
+    """Create any missing day partitions for [start, end]. Returns how many were created."""
+    existing = daily_partitions(conn, table)
+    created = 0
+    day = start
+    while day <= end:
+        if day not in existing:
+            _create_day(conn, table, key, day)
+            created += 1
+        day += timedelta(days=1)
+    if created:
+        logger.info("Created %d partition(s) of %s through %s", created, table, end)
+    return created
+
+
+def drop_expired(conn: Connection, table: str, key: str, cutoff: datetime) -> int:
+    """Detach and drop day partitions lying wholly before cutoff; trim the default partition. Returns rows removed."""
+    removed = 0
+    for day, name in sorted(daily_partitions(conn, table).items()):
+        if day + timedelta(days=1) > cutoff.date():
+            break
+        # never-analyzed partitions report reltuples = -1
+        removed += conn.execute(text("SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = to_regclass(:n)"), {"n": name}).scalar() or 0
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        logger.info("Dropped partition %s", name)
+    removed += conn.execute(text(f"DELETE FROM {table}_default WHERE {key} < :cutoff"), {"cutoff": cutoff}).rowcount
+    return removed
+
+
+def maintain(conn: Connection, table: str, retention_days: int) -> int:
+    """Daily upkeep for one partitioned table: drop expired days, create upcoming ones."""
+    key = PARTITION_KEYS[table]
+    target = physical_table(table)
+    now = datetime.now(timezone.utc)
+    removed = drop_expired(conn, target, key, now - timedelta(days=retention_days))
+    ensure_partitions(conn, target, key, now.date(), now.date() + timedelta(days=CFG.PARTITION_DAYS_AHEAD))
+    return removed
+
+
+def estimated_rows(conn: Connection, table: str) -> int:
+    """Catalog row estimate; for a partitioned table, the sum over its partitions."""
+    return conn.execute(
+        text("SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint FROM pg_class c "
+             "WHERE c.oid = to_regclass(:t) OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:t))"),
+        {"t": table},
+    ).scalar()
+
+
+def convert(table: str) -> None:
+    """Rewrite a plain table as a daily-partitioned one, keeping its rows, indexes, sequences and dependent views."""
+    key = PARTITION_KEYS[table]
+    target = physical_table(table)
+    old = f"{target}_unpartitioned"
+    with db_conn() as conn:
+        if is_partitioned(conn, target):
+            logger.info("%s is already partitioned", target)
+            return
+        conn.execute(text(f"LOCK TABLE {target} IN ACCESS EXCLUSIVE MODE"))
+        # the single-column primary key can't survive partitioning (it must include the key)
+        indexes = conn.execute(text(
+            "SELECT i.indexdef FROM pg_indexes i "
+            "WHERE i.schemaname = current_schema() AND i.tablename = :t "
+            "AND i.indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'p')"
+        ), {"t": target}).scalars().all()
+        views = conn.execute(text(
+            "SELECT DISTINCT v.relname, pg_get_viewdef(v.oid) FROM pg_depend d "
+            "JOIN pg_rewrite r ON r.oid = d.objid JOIN pg_class v ON v.oid = r.ev_class "
+            "WHERE d.refobjid = to_regclass(:t) AND v.oid <> d.refobjid"
+        ), {"t": target}).all()
+        bounds = conn.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {target}")).one()
+
+        conn.execute(text(f"ALTER TABLE {target} RENAME TO {old}"))
+        conn.execute(text(f"CREATE TABLE {target} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE ({key})"))
+        serials = conn.execute(text(
+            "SELECT a.attname, pg_get_serial_sequence(:old, a.attname) FROM pg_attribute a "
+            "WHERE a.attrelid = to_regclass(:old) AND a.attnum > 0 AND NOT a.attisdropped"
+        ), {"old": old}).all()
+        for column, seq in serials:
+            if seq:
+                conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY {target}.{column}"))
+        conn.execute(text(f"CREATE TABLE {target}_default PARTITION OF {target} DEFAULT"))
+
+        today = datetime.now(timezone.utc).date()
+        first = bounds[0].astimezone(timezone.utc).date() if bounds[0] is not None else today
+        last = max(bounds[1].astimezone(timezone.utc).date() if bounds[1] is not None else today, today) + timedelta(days=CFG.PARTITION_DAYS_AHEAD)
+        ensure_partitions(conn, target, key, first, last)
+        moved = conn.execute(text(f"INSERT INTO {target} SELECT * FROM {old}")).rowcount
+        conn.execute(text(f"DROP TABLE {old} CASCADE"))
+        for ddl in indexes:
+            conn.exec_driver_sql(ddl)
+        for name, body in views:
+            conn.exec_driver_sql(f"CREATE OR REPLACE VIEW {name} AS {body}")
+    logger.info("Partitioned %s by day on %s (%d rows, %s .. %s)", target, key, moved, first, last)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Daily partition maintenance")
+    ap.add_argument("--convert", nargs="+", choices=sorted(PARTITION_KEYS), default=[],
+                    help="rewrite these tables as daily-partitioned tables")
+    args = ap.parse_args()
+    for table in args.convert:
+        convert(table)
+
+
+if __name__ == "__main__":
+    main()
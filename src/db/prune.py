@@ -1,11 +1,17 @@
 """
 Batch-delete old rows to stay within Neon free-tier storage limits (~0.5 GB).
-Uses batched DELETE to avoid long-running transactions.
+Plain tables are pruned in keyset order along the time index: each batch deletes one
+contiguous time range and commits, with a pause between batches so the hourly jobs keep
+the compute. Progress is kept in prune_state, so an interrupted run resumes where it
+stopped. Tables converted to daily partitions (src/db/partitions.py) drop whole expired days.
 """
+import time
 from datetime import datetime, timedelta, timezone
 from sqlalchemy import text
 from src.config import CFG
-from src.utils.db_utils import db_conn
+from src.db.partitions import estimated_rows, is_partitioned, maintain
+from src.db.storage import physical_table
+from src.utils.db_utils import bump_table_version, db_conn, get_engine
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
@@ -14,34 +20,110 @@ TABLE_RETENTION = {
     "forecasts": CFG.FORECAST_RETENTION_DAYS,
     "observations": CFG.OBSERVATION_RETENTION_DAYS,
     "errors": CFG.ERROR_RETENTION_DAYS,
+    # daily rollups are a few rows per day and are kept
+    "error_rollup_hourly": CFG.ERROR_RETENTION_DAYS,
 }
 
 COLUMN_MAP = {
     "forecasts": "valid_time",
     "observations": "obs_time",
     "errors": "valid_time",
+    "error_rollup_hourly": "bucket",
 }
 
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+SAVE_STATE_SQL = """
+INSERT INTO prune_state (table_name, pruned_before, updated_at) VALUES (:t, :hi, now())
+ON CONFLICT (table_name) DO UPDATE SET pruned_before = EXCLUDED.pruned_before, updated_at = now()
+"""
+
+
+def _resume_point(target: str) -> tuple[bool, datetime | None]:
+    """(state table usable, time before which target has already been pruned)."""
+    try:
+        with db_conn() as conn:
+            return True, conn.execute(
+                text("SELECT pruned_before FROM prune_state WHERE table_name = :t"), {"t": target}
+            ).scalar()
+    except Exception as e:
+        logger.warning("prune_state unavailable (%s); %s will not resume", e, target)
+        return False, None
+
+
+def _batch_end(conn, target: str, col: str, lo, cutoff, batch_size: int):
+    """Upper bound of the next contiguous range holding ~batch_size rows from lo."""
+    hi = conn.execute(
+        text(f"SELECT {col} FROM {target} WHERE {col} >= :lo AND {col} < :cutoff ORDER BY {col} OFFSET :n LIMIT 1"),
+        {"lo": lo, "cutoff": cutoff, "n": batch_size},
+    ).scalar()
+    if hi is None:
+        return cutoff
+    if hi == lo:
+        # more than a batch shares one timestamp; take that whole timestamp
+        hi = conn.execute(
+            text(f"SELECT MIN({col}) FROM {target} WHERE {col} > :lo AND {col} < :cutoff"),
+            {"lo": lo, "cutoff": cutoff},
+        ).scalar() or cutoff
+    return hi
+
+
+def vacuum_analyze(target: str) -> None:
+    # VACUUM can't run inside a transaction block
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM (ANALYZE) {target}"))
+
+
 def prune_table(table: str, retention_days: int) -> int:
     cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
     col = COLUMN_MAP[table]
+    # under the compact layout forecasts/observations are views; delete from the fact tables
+    target = physical_table(table)
     total_deleted = 0
     batch_size = CFG.PRUNE_BATCH_SIZE
+    started = time.perf_counter()
 
     with db_conn() as conn:
-        while True:
-            result = conn.execute(
-                text(f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {col} < :cutoff LIMIT :batch)"),
-                {"cutoff": cutoff, "batch": batch_size},
-            )
-            deleted = result.rowcount
-            total_deleted += deleted
-            if deleted < batch_size:
-                break
+        if is_partitioned(conn, target):
+            total_deleted = maintain(conn, table, retention_days)
+            bump_table_version(conn, target)
+            if total_deleted:
+                logger.info("Pruned ~%d rows from %s (cutoff: %s)", total_deleted, target, cutoff.isoformat())
+            return total_deleted
+    tracked, resume = _resume_point(target)
+    with db_conn() as conn:
+        # starting at the resume point skips the dead index entries of earlier runs
+        lo = conn.execute(text(f"SELECT MIN({col}) FROM {target} WHERE {col} >= :since"), {"since": resume or EPOCH}).scalar()
+    if lo is None or lo >= cutoff:
+        logger.info("Nothing to prune in %s (cutoff: %s)", target, cutoff.isoformat())
+        return 0
+
+    batches = 0
+    while lo < cutoff:
+        # one short transaction per batch: locks and dead tuples are released as we go
+        with db_conn() as conn:
+            hi = _batch_end(conn, target, col, lo, cutoff, batch_size)
+            deleted = conn.execute(
+                text(f"DELETE FROM {target} WHERE {col} >= :lo AND {col} < :hi"), {"lo": lo, "hi": hi}
+            ).rowcount
+            if tracked:
+                conn.execute(text(SAVE_STATE_SQL), {"t": target, "hi": hi})
+            if deleted:
+                bump_table_version(conn, target)
+        total_deleted += deleted
+        batches += 1
+        lo = hi
+        if lo < cutoff and CFG.PRUNE_THROTTLE_SECONDS > 0:
+            time.sleep(CFG.PRUNE_THROTTLE_SECONDS)
 
+    elapsed = time.perf_counter() - started
     if total_deleted:
-        logger.info("Pruned %d rows from %s (cutoff: %s)", total_deleted, table, cutoff.isoformat())
+        logger.info(
+            "Pruned %d rows from %s in %d batch(es), %.1fs (%.0f rows/s; cutoff: %s)",
+            total_deleted, target, batches, elapsed, total_deleted / max(elapsed, 1e-9), cutoff.isoformat(),
+        )
+        vacuum_analyze(target)
     return total_deleted
 
 
@@ -56,11 +138,7 @@ def table_row_counts() -> dict[str, int]:
     counts = {}
     with db_conn() as conn:
         for table in TABLE_RETENTION:
-            row = conn.execute(
-                text("SELECT reltuples::bigint AS n FROM pg_class WHERE relname = :tbl"),
-                {"tbl": table},
-            ).fetchone()
-            counts[table] = row[0] if row else 0
+            counts[table] = estimated_rows(conn, physical_table(table))
     return counts
 
 
@@ -42,30 +42,136 @@ CREATE TABLE IF NOT EXISTS errors (
 );
 
 -- Pruning indexes
-CREATE INDEX IF NOT EXISTS idx_forecasts_valid_time ON forecasts(valid_time);
-CREATE INDEX IF NOT EXISTS idx_observations_obs_time ON observations(obs_time);
 CREATE INDEX IF NOT EXISTS idx_errors_valid_time ON errors(valid_time);
-
--- Compound indexes for common query patterns (reduce seq scans)
-CREATE INDEX IF NOT EXISTS idx_forecasts_var_src_time ON forecasts(variable, source, valid_time);
-CREATE INDEX IF NOT EXISTS idx_forecasts_var_valid ON forecasts(variable, valid_time);
-CREATE INDEX IF NOT EXISTS idx_observations_var_obs ON observations(variable, obs_time);
 CREATE INDEX IF NOT EXISTS idx_errors_var_horiz_time ON errors(variable, horizon_hours, valid_time);
 
--- Remove any pre-existing duplicate observation rows before creating unique index
-DELETE FROM observations
+-- Error sums per source/variable/horizon and UTC hour / day (src/verify/rollups.py).
+-- Sums pool exactly across buckets: mae = sum_abs/n, rmse = sqrt(sum_sq/n), mape = sum_ape/n
+CREATE TABLE IF NOT EXISTS error_rollup_hourly (
+  source TEXT NOT NULL,
+  variable TEXT NOT NULL,
+  horizon_hours INT NOT NULL,
+  bucket TIMESTAMPTZ NOT NULL,
+  n BIGINT NOT NULL,
+  sum_abs DOUBLE PRECISION NOT NULL,
+  sum_sq DOUBLE PRECISION NOT NULL,
+  sum_ape DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (source, variable, horizon_hours, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_error_rollup_hourly_bucket ON error_rollup_hourly(bucket);
+
+CREATE TABLE IF NOT EXISTS error_rollup_daily (
+  source TEXT NOT NULL,
+  variable TEXT NOT NULL,
+  horizon_hours INT NOT NULL,
+  bucket TIMESTAMPTZ NOT NULL,       -- UTC midnight
+  n BIGINT NOT NULL,
+  sum_abs DOUBLE PRECISION NOT NULL,
+  sum_sq DOUBLE PRECISION NOT NULL,
+  sum_ape DOUBLE PRECISION NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (source, variable, horizon_hours, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_error_rollup_daily_bucket ON error_rollup_daily(bucket);
+
+-- forecasts/observations are views over the compact tables once src/db/compact_layout.sql
+-- has run; their indexes and dedup only apply while they are tables (plain or partitioned)
+DO $$
+BEGIN
+  IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('forecasts')) IN ('r', 'p') THEN
+    CREATE INDEX IF NOT EXISTS idx_forecasts_valid_time ON forecasts(valid_time);
+    -- Compound indexes for common query patterns (reduce seq scans)
+    CREATE INDEX IF NOT EXISTS idx_forecasts_var_src_time ON forecasts(variable, source, valid_time);
+    CREATE INDEX IF NOT EXISTS idx_forecasts_var_valid ON forecasts(variable, valid_time);
+  END IF;
+
+  IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('observations')) IN ('r', 'p') THEN
+    CREATE INDEX IF NOT EXISTS idx_observations_obs_time ON observations(obs_time);
+    CREATE INDEX IF NOT EXISTS idx_observations_var_obs ON observations(variable, obs_time);
+
+    -- Remove any pre-existing duplicate observation rows before creating unique index
+    DELETE FROM observations
+    WHERE ctid IN (
+      SELECT ctid FROM (
+        SELECT ctid, ROW_NUMBER() OVER (
+          PARTITION BY lat, lon, variable, obs_time, source ORDER BY created_at DESC
+        ) AS rn
+        FROM observations
+      ) ranked
+      WHERE ranked.rn > 1
+    );
+
+    -- Prevent duplicate observation rows (hourly re-ingestion)
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_observations_unique ON observations(lat, lon, variable, obs_time, source);
+  END IF;
+END $$;
+
+-- Configured locations (seeded by scripts/seed_locations.py) plus static per-location vendor lookups
+CREATE TABLE IF NOT EXISTS locations (
+  id BIGSERIAL PRIMARY KEY,
+  name TEXT NOT NULL,
+  lat DOUBLE PRECISION NOT NULL,
+  lon DOUBLE PRECISION NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Migration: weather.gov /points resolution (gridId, gridX, gridY) cached per location
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS nws_office TEXT;
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS nws_grid_x INT;
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS nws_grid_y INT;
+ALTER TABLE locations ADD COLUMN IF NOT EXISTS nws_resolved_at TIMESTAMPTZ;
+
+-- Remove duplicate locations (older seed runs appended on every run) before creating unique index
+DELETE FROM locations
 WHERE ctid IN (
   SELECT ctid FROM (
-    SELECT ctid, ROW_NUMBER() OVER (
-      PARTITION BY lat, lon, variable, obs_time, source ORDER BY created_at DESC
-    ) AS rn
-    FROM observations
+    SELECT ctid, ROW_NUMBER() OVER (PARTITION BY lat, lon ORDER BY id) AS rn
+    FROM locations
   ) ranked
   WHERE ranked.rn > 1
 );
 
--- Prevent duplicate observation rows (hourly re-ingestion)
-CREATE UNIQUE INDEX IF NOT EXISTS idx_observations_unique ON observations(lat, lon, variable, obs_time, source);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_locations_lat_lon ON locations(lat, lon);
+
+-- Fingerprint of the last stored forecast series per vendor/location and the valid times
+-- written under it (src/etl/dedup.py); rows of an unchanged vendor run are not written again
+CREATE TABLE IF NOT EXISTS forecast_payload_state (
+  source TEXT NOT NULL,
+  lat DOUBLE PRECISION NOT NULL,
+  lon DOUBLE PRECISION NOT NULL,
+  payload_hash TEXT NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (source, lat, lon)
+);
+ALTER TABLE forecast_payload_state ADD COLUMN IF NOT EXISTS stored_times TIMESTAMPTZ[] NOT NULL DEFAULT '{}';
+
+-- Keyset prune progress per table (src/db/prune.py): rows before pruned_before are gone
+CREATE TABLE IF NOT EXISTS prune_state (
+  table_name TEXT PRIMARY KEY,
+  pruned_before TIMESTAMPTZ NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Bumped by writers in their write transaction (src/utils/db_utils.py); cached query
+-- results (src/utils/query_cache.py) are only served while the versions they read are current
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name TEXT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Estimated Neon data transfer per UTC day and job, added by each run (db_utils.job_run)
+CREATE TABLE IF NOT EXISTS transfer_usage (
+  day DATE NOT NULL,
+  job TEXT NOT NULL,
+  runs INT NOT NULL,
+  queries BIGINT NOT NULL,
+  bytes_sent BIGINT NOT NULL,
+  bytes_received BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  PRIMARY KEY (day, job)
+);
 
 -- Lightweight model registry pointer (canonical is DagsHub/MLflow)
 CREATE TABLE IF NOT EXISTS models (
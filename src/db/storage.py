@@ -0,0 +1,115 @@
+"""
+Write path for forecasts and observations under either storage layout (STORAGE_LAYOUT):
+- "wide": the original forecasts / observations tables
+- "compact": forecast_values / observation_values keyed by small ints into sources,
+  variables and locations (src/db/compact_layout.sql); forecasts / observations are
+  read-only views over them, so readers don't change
+Dimension ids are cached per process; unknown names and coordinates are inserted on first use.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from src.config import CFG, UNIT_MAP
+from src.utils.db_utils import copy_dataframe, db_conn, insert_dataframe_dedup
+
+# logical table -> physical table under the compact layout
+PHYSICAL = {
+    "forecasts": "forecast_values",
+    "observations": "observation_values",
+}
+
+OBSERVATION_KEY = ["lat", "lon", "variable", "obs_time", "source"]
+COMPACT_OBSERVATION_KEY = ["location_id", "variable_id", "obs_time", "source_id"]
+
+FORECAST_VALUE_COLUMNS = ["issue_time", "valid_time", "location_id", "value", "horizon_hours", "source_id", "variable_id"]
+OBSERVATION_VALUE_COLUMNS = ["obs_time", "location_id", "value", "source_id", "variable_id", "station_id"]
+
+_ids: dict[str, dict] = {"sources": {}, "variables": {}, "locations": {}}
+_ids_lock = threading.Lock()
+
+
+def is_compact() -> bool:
+    return CFG.STORAGE_LAYOUT == "compact"
+
+
+def physical_table(table: str) -> str:
+    """Table that actually holds the rows of a logical table under the active layout."""
+    return PHYSICAL.get(table, table) if is_compact() else table
+
+
+def _name_ids(dim: str, names) -> dict[str, int]:
+    cache = _ids[dim]
+    missing = sorted(set(names) - cache.keys())
+    if missing:
+        with _ids_lock, db_conn() as conn:
+            if dim == "variables":
+                conn.execute(
+                    text("INSERT INTO variables (name, unit) VALUES (:name, :unit) ON CONFLICT (name) DO NOTHING"),
+                    [{"name": n, "unit": UNIT_MAP.get(n, "")} for n in missing],
+                )
+            else:
+                conn.execute(
+                    text(f"INSERT INTO {dim} (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+                    [{"name": n} for n in missing],
+                )
+            rows = conn.execute(text(f"SELECT name, id FROM {dim} WHERE name = ANY(:names)"), {"names": missing})
+            cache.update({name: i for name, i in rows})
+    return cache
+
+
+def _location_ids(points) -> dict[tuple[float, float], int]:
+    cache = _ids["locations"]
+    missing = sorted(set(points) - cache.keys())
+    if missing:
+        with _ids_lock, db_conn() as conn:
+            conn.execute(
+                text("INSERT INTO locations (name, lat, lon) VALUES (:name, :lat, :lon) ON CONFLICT (lat, lon) DO NOTHING"),
+                [{"name": f"{lat},{lon}", "lat": lat, "lon": lon} for lat, lon in missing],
+            )
+            rows = conn.execute(
+                text("SELECT l.lat, l.lon, l.id FROM locations l "
+                     "JOIN unnest(CAST(:lats AS double precision[]), CAST(:lons AS double precision[])) AS p(lat, lon) "
+                     "ON l.lat = p.lat AND l.lon = p.lon"),
+                {"lats": [p[0] for p in missing], "lons": [p[1] for p in missing]},
+            )
+            cache.update({(float(lat), float(lon)): i for lat, lon, i in rows})
+    return cache
+
+
+def _with_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Add source_id / variable_id / location_id columns for the compact fact tables."""
+    out = pd.DataFrame(index=df.index)
+    for dim, col in (("sources", "source"), ("variables", "variable")):
+        codes, names = pd.factorize(df[col])
+        ids = _name_ids(dim, names)
+        out[f"{col}_id"] = np.array([ids[n] for n in names], dtype=np.int16)[codes]
+    lat = df["lat"].to_numpy(dtype=float)
+    lon = df["lon"].to_numpy(dtype=float)
+    points = pd.MultiIndex.from_arrays([lat, lon])
+    codes, uniques = pd.factorize(points)
+    ids = _location_ids(uniques)
+    out["location_id"] = np.array([ids[p] for p in uniques], dtype=np.int32)[codes]
+    out["value"] = df["value"].to_numpy(dtype=np.float32)
+    return out
+
+
+def write_forecasts(df: pd.DataFrame) -> int:
+    """Append forecast rows (forecasts-table columns) under the active layout."""
+    if df.empty or not is_compact():
+        return copy_dataframe(df, "forecasts")
+    out = _with_keys(df)
+    out["issue_time"] = df["issue_time"]
+    out["valid_time"] = df["valid_time"]
+    out["horizon_hours"] = df["horizon_hours"].astype(np.int16)
+    return copy_dataframe(out[FORECAST_VALUE_COLUMNS], "forecast_values")
+
+
+def insert_observations(df: pd.DataFrame) -> int:
+    """Insert observation rows (observations-table columns), skipping ones already stored."""
+    if df.empty or not is_compact():
+        return insert_dataframe_dedup(df, "observations", OBSERVATION_KEY)
+    out = _with_keys(df)
+    out["obs_time"] = df["obs_time"]
+    out["station_id"] = df["station_id"] if "station_id" in df.columns else None
+    return insert_dataframe_dedup(out[OBSERVATION_VALUE_COLUMNS], "observation_values", COMPACT_OBSERVATION_KEY)
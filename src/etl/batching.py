@@ -0,0 +1,47 @@
+"""
+Multi-location request batching for vendors with bulk endpoints.
+Locations are grouped greedily into batches that respect a vendor's point-count and
+URL-length limits; the vendor's batch fetcher returns one frame per location, in order,
+so the fetch engine can hand results back exactly as it does for single-point fetches.
+"""
+from dataclasses import dataclass
+from typing import Callable
+import pandas as pd
+import requests
+
+# (locations, variables) -> one frame per location, aligned with the input
+BatchFetcher = Callable[[list[dict], list[str]], list[pd.DataFrame]]
+# (locations, variables) -> (url, params) of the request the batch would send
+BatchRequest = Callable[[list[dict], list[str]], tuple[str, dict]]
+
+
+@dataclass(frozen=True)
+class Batching:
+    fetch: BatchFetcher
+    request: BatchRequest
+    max_points: int
+    max_url_length: int = 0  # 0 = no URL limit
+
+
+def request_url(url: str, params: dict) -> str:
+    """Fully encoded URL requests would send for url + params."""
+    return requests.Request("GET", url, params=params).prepare().url
+
+
+def plan_batches(locations: list[dict], variables: list[str], batching: Batching) -> list[list[dict]]:
+    """Split locations into consecutive batches within the point and URL-length limits."""
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    for loc in locations:
+        candidate = current + [loc]
+        fits = len(candidate) <= max(1, batching.max_points)
+        if fits and batching.max_url_length and current:
+            fits = len(request_url(*batching.request(candidate, variables))) <= batching.max_url_length
+        if fits:
+            current = candidate
+        else:
+            batches.append(current)
+            current = [loc]
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,93 @@
+"""
+Change detection for vendor forecasts.
+forecast_frame fingerprints the vendor content of a vendor/location payload (every
+variable, valid time, value and unit, before the horizon filter; no issue time or
+horizon, which move with the fetch clock) into `df.attrs["payload_hash"]`.
+forecast_payload_state keeps, per (source, lat, lon), the last fingerprint and the valid
+times already written under it. While a vendor has not issued a new run the fingerprint
+is unchanged, so every row at one of those valid times already holds the stored value
+and is suppressed; rows at valid times the horizon filter newly reaches are still written.
+A new run (new fingerprint) starts over.
+"""
+import hashlib
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from src.utils.db_utils import db_conn, fetch_df
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+HASH_ATTR = "payload_hash"
+
+Key = tuple[str, float, float]
+# payload fingerprint, valid times (epoch ns) written under it
+State = tuple[str, frozenset[int]]
+
+UPSERT_SQL = """
+INSERT INTO forecast_payload_state (source, lat, lon, payload_hash, stored_times, updated_at)
+VALUES (:source, :lat, :lon, :payload_hash, CAST(:stored_times AS TIMESTAMPTZ[]), now())
+ON CONFLICT (source, lat, lon) DO UPDATE SET
+  payload_hash = EXCLUDED.payload_hash,
+  stored_times = EXCLUDED.stored_times,
+  updated_at = EXCLUDED.updated_at
+"""
+
+
+def fingerprint(series: dict) -> str:
+    """Stable digest of {variable: (times, values, unit)}."""
+    h = hashlib.blake2b(digest_size=16)
+    for variable in sorted(series):
+        times, values, unit = series[variable]
+        h.update(f"{variable}|{unit}|".encode())
+        h.update(pd.DatetimeIndex(times).asi8.tobytes())
+        h.update(np.asarray(values, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+def _epoch_ns(times) -> frozenset[int]:
+    return frozenset(pd.DatetimeIndex(pd.to_datetime(list(times), utc=True)).asi8.tolist()) if len(times) else frozenset()
+
+
+def load_state(sources: Iterable[str]) -> dict[Key, State]:
+    """Last stored fingerprint and its written valid times per (source, lat, lon); empty if unreadable."""
+    try:
+        df = fetch_df(
+            "SELECT source, lat, lon, payload_hash, stored_times FROM forecast_payload_state WHERE source = ANY(:sources)",
+            {"sources": list(sources)},
+        )
+    except Exception as e:
+        logger.warning("Forecast dedup state unavailable (%s); writing all rows", e)
+        return {}
+    return {
+        (r.source, float(r.lat), float(r.lon)): (r.payload_hash, _epoch_ns(r.stored_times or []))
+        for r in df.itertuples(index=False)
+    }
+
+
+def unstored(df: pd.DataFrame, digest: str, previous: State | None) -> tuple[pd.DataFrame, State]:
+    """
+    Rows of a horizon-filtered frame that are not already stored under the same payload,
+    and the location's state once they are written.
+    """
+    times = pd.DatetimeIndex(df["valid_time"]).asi8
+    if previous is None or previous[0] != digest:
+        return df, (digest, frozenset(times.tolist()))
+    seen = np.isin(times, np.fromiter(previous[1], dtype=np.int64, count=len(previous[1])))
+    return df[~seen], (digest, previous[1] | frozenset(times[~seen].tolist()))
+
+
+def save_state(source: str, states: dict[tuple[float, float], State]) -> None:
+    """Record states once their rows are stored (best-effort: a miss only costs a rewrite)."""
+    if not states:
+        return
+    try:
+        with db_conn() as conn:
+            conn.execute(text(UPSERT_SQL), [
+                {"source": source, "lat": lat, "lon": lon, "payload_hash": digest,
+                 "stored_times": pd.to_datetime(sorted(times), utc=True).to_pydatetime().tolist()}
+                for (lat, lon), (digest, times) in states.items()
+            ])
+    except Exception as e:
+        logger.warning("Could not save forecast dedup state for %s: %s", source, e)
@@ -0,0 +1,166 @@
+"""
+Concurrent vendor × location fetch engine.
+Every (vendor, location) pair is scheduled at once; each vendor gets its own bounded
+thread pool (REQUESTS_CONCURRENCY, overridable per vendor via VENDOR_CONCURRENCY), so
+wall time scales with the slowest vendor rather than the sum of all requests.
+Vendors with bulk endpoints declare a `Batching` policy and are fetched in multi-location
+batches (src/etl/batching.py) instead of one request per location.
+stream_forecasts writes results in fixed-size batches while other fetches are still in
+flight, so memory stays flat as the location list grows and earlier batches survive a crash.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterator
+import pandas as pd
+from src.config import CFG
+from src.etl.batching import Batching, plan_batches
+from src.etl.dedup import HASH_ATTR, State, load_state, save_state, unstored
+from src.db.storage import write_forecasts
+from src.utils.http_utils import breaker_states
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+Fetcher = Callable[[float, float, list[str]], pd.DataFrame]
+
+
+@dataclass(frozen=True)
+class Vendor:
+    source: str
+    fetch: Fetcher
+    batching: Batching | None = None
+
+
+def vendor_concurrency(source: str) -> int:
+    return max(1, int(CFG.VENDOR_CONCURRENCY.get(source, CFG.REQUESTS_CONCURRENCY)))
+
+
+def _fetch_one(vendor: Vendor, loc: dict, variables: list[str]) -> pd.DataFrame:
+    # One failing location must not take down the rest of the run
+    logger.debug("Fetching %s for %s", vendor.source, loc.get("name", loc))
+    try:
+        return vendor.fetch(loc["lat"], loc["lon"], variables)
+    except Exception as e:
+        logger.warning("%s fetch failed for %s: %s; skipping", vendor.source, loc.get("name", loc), e)
+        return pd.DataFrame()
+
+
+def _fetch_batch(vendor: Vendor, locs: list[dict], variables: list[str]) -> list[pd.DataFrame]:
+    logger.debug("Fetching %s for %d location(s) in one request", vendor.source, len(locs))
+    try:
+        frames = vendor.batching.fetch(locs, variables)
+        if len(frames) != len(locs):
+            raise ValueError(f"expected {len(locs)} frames, got {len(frames)}")
+        return frames
+    except Exception as e:
+        logger.warning("%s batch fetch failed for %d location(s): %s; skipping", vendor.source, len(locs), e)
+        return [pd.DataFrame() for _ in locs]
+
+
+def _fetch_group(vendor: Vendor, locs: list[dict], variables: list[str]) -> list[pd.DataFrame]:
+    if vendor.batching is None:
+        return [_fetch_one(vendor, locs[0], variables)]
+    return _fetch_batch(vendor, locs, variables)
+
+
+def _groups(vendor: Vendor, locations: list[dict], variables: list[str]) -> list[list[dict]]:
+    if vendor.batching is None:
+        return [[loc] for loc in locations]
+    return plan_batches(locations, variables, vendor.batching)
+
+
+def iter_fetch(vendors: list[Vendor], locations: list[dict], variables: list[str]) -> Iterator[tuple[str, dict, pd.DataFrame]]:
+    """Yield (source, location, frame) as each vendor/location fetch completes."""
+    pools = {
+        v.source: ThreadPoolExecutor(max_workers=vendor_concurrency(v.source), thread_name_prefix=f"fetch-{v.source}")
+        for v in vendors
+    }
+    plans = {v.source: _groups(v, locations, variables) for v in vendors}
+    futures = {}
+    try:
+        # Interleave submissions so every vendor starts working immediately
+        for i in range(max(map(len, plans.values()), default=0)):
+            for v in vendors:
+                if i < len(plans[v.source]):
+                    locs = plans[v.source][i]
+                    futures[pools[v.source].submit(_fetch_group, v, locs, variables)] = (v.source, locs)
+        for fut in as_completed(futures):
+            # pop so a consumed result isn't kept alive until the whole run ends
+            source, locs = futures.pop(fut)
+            for loc, df in zip(locs, fut.result()):
+                yield source, loc, df
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _log_run(vendors: list[Vendor], locations: list[dict], started: float, suppressed: dict[str, int]) -> None:
+    logger.info(
+        "Fetched %d vendor(s) × %d location(s) in %.1fs",
+        len(vendors), len(locations), time.perf_counter() - started,
+    )
+    for source, n in suppressed.items():
+        if n:
+            logger.info("%s: %d unchanged forecast rows suppressed", source, n)
+    for host, state in breaker_states().items():
+        if state["state"] != "closed" or state["short_circuited"]:
+            logger.warning("Circuit breaker %s: %s", host, state)
+
+
+class ForecastBatchWriter:
+    """Buffers horizon-filtered forecast frames and appends them to `forecasts` every `batch_rows` rows."""
+
+    def __init__(self, batch_rows: int):
+        self.batch_rows = max(1, batch_rows)
+        self.inserted = 0
+        self.batches = 0
+        self._frames: list[pd.DataFrame] = []
+        self._states: dict[str, dict[tuple[float, float], State]] = {}
+        self._rows = 0
+
+    def add(self, source: str, loc: dict, df: pd.DataFrame, state: State | None = None) -> None:
+        if not df.empty:
+            self._frames.append(df)
+            self._rows += len(df)
+        if state is not None:
+            self._states.setdefault(source, {})[(float(loc["lat"]), float(loc["lon"]))] = state
+        if self._rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._frames:
+            self.inserted += write_forecasts(pd.concat(self._frames, ignore_index=True))
+            self.batches += 1
+        # dedup state only once its rows are committed
+        for source, states in self._states.items():
+            save_state(source, states)
+        self._frames, self._states, self._rows = [], {}, 0
+
+
+def stream_forecasts(vendors: list[Vendor], locations: list[dict], variables: list[str], batch_rows: int | None = None) -> int:
+    """Fetch concurrently and write forecasts in batches as results arrive. Returns rows inserted."""
+    started = time.perf_counter()
+    known = load_state(v.source for v in vendors) if CFG.FORECAST_DEDUP else None
+    writer = ForecastBatchWriter(CFG.FORECAST_BATCH_ROWS if batch_rows is None else batch_rows)
+    suppressed = {v.source: 0 for v in vendors}
+    for source, loc, df in iter_fetch(vendors, locations, variables):
+        if df.empty:
+            continue
+        digest = df.attrs.get(HASH_ATTR)
+        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
+        state = None
+        if known is not None and digest:
+            key = (source, float(loc["lat"]), float(loc["lon"]))
+            previous = known.get(key)
+            fresh, state = unstored(df, digest, previous)
+            suppressed[source] += len(df) - len(fresh)
+            if state == previous:
+                continue  # nothing new to write or record
+            known[key] = state
+            df = fresh
+        writer.add(source, loc, df, state)
+    writer.flush()
+    _log_run(vendors, locations, started, suppressed)
+    logger.info("Streamed %d forecast rows in %d batch(es)", writer.inserted, writer.batches)
+    return writer.inserted
@@ -0,0 +1,59 @@
+"""
+Columnar construction of long-format forecast frames.
+Vendor parsers hand over whole response arrays per variable; the horizon filter runs on
+the time axis before any rows are materialised, and unit conversion is one affine
+operation per array instead of a function call per value.
+"""
+from datetime import datetime
+from typing import Iterable, Sequence
+import numpy as np
+import pandas as pd
+from src.etl.dedup import HASH_ATTR, fingerprint
+from src.utils.time_utils import horizon_hours_array
+from src.utils.unit_utils import normalize_array
+
+FORECAST_COLUMNS = ["source", "lat", "lon", "variable", "issue_time", "valid_time", "horizon_hours", "value", "unit"]
+
+# variable -> (valid_times, values, source unit)
+Series = tuple[pd.DatetimeIndex, Sequence, str]
+
+
+def forecast_frame(source: str, lat: float, lon: float, issue: datetime, series: dict[str, Series], horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    """
+    Build the forecasts-table frame for one vendor/location.
+    Missing values (None/NaN) and unparseable times are dropped; when `horizons` is given
+    only those lead times are kept.
+    """
+    keep_h = np.asarray(list(horizons)) if horizons is not None else None
+    names, units, times_out, leads_out, values_out = [], [], [], [], []
+    for variable, (times, values, unit) in series.items():
+        times = pd.DatetimeIndex(times)
+        vals = np.asarray(values, dtype=float)
+        lead = horizon_hours_array(issue, times)
+        mask = ~np.isnan(vals) & ~np.isnan(lead)
+        if keep_h is not None:
+            mask &= np.isin(lead, keep_h)
+        n = int(mask.sum())
+        if not n:
+            continue
+        converted, canon = normalize_array(variable, vals[mask], unit)
+        names.append(np.full(n, variable, dtype=object))
+        units.append(np.full(n, canon, dtype=object))
+        times_out.append(times.tz_convert("UTC").tz_localize(None).to_numpy()[mask])
+        leads_out.append(lead[mask].astype(int))
+        values_out.append(converted)
+    if not values_out:
+        return pd.DataFrame()
+    # one frame from concatenated columns: per-variable frames + concat cost more than the parse
+    df = pd.DataFrame({
+        "source": source,
+        "lat": float(lat), "lon": float(lon),
+        "variable": np.concatenate(names),
+        "issue_time": pd.Timestamp(issue).tz_convert("UTC"),
+        "valid_time": pd.DatetimeIndex(np.concatenate(times_out)).tz_localize("UTC"),
+        "horizon_hours": np.concatenate(leads_out),
+        "value": np.concatenate(values_out),
+        "unit": np.concatenate(units),
+    }, columns=FORECAST_COLUMNS)
+    df.attrs[HASH_ATTR] = fingerprint(series)
+    return df
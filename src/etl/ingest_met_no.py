@@ -2,17 +2,37 @@
 MET Norway Locationforecast 2.0 (no key; requires User-Agent).
 Docs: https://api.met.no/weatherapi/locationforecast/2.0/documentation
 """
+from datetime import datetime
+from typing import Iterable
 import pandas as pd
 from src.config import CFG, MET_NO_URL
 from src.utils.http_utils import get_json
-from src.utils.time_utils import now_utc, to_utc, horizon_hours
-from src.utils.unit_utils import normalize_value
-from src.utils.db_utils import insert_dataframe
+from src.utils.time_utils import now_utc, to_utc_index
+from src.etl.fetch_engine import Vendor, stream_forecasts
+from src.etl.frames import forecast_frame
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def fetch_met_no(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
+def parse_met_no(data: dict, lat: float, lon: float, variables: list[str], issue: datetime, horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    timeseries = data.get("properties", {}).get("timeseries", [])
+    if not timeseries:
+        return pd.DataFrame()
+    times = to_utc_index([ts["time"] for ts in timeseries])
+    steps = [ts.get("data", {}) for ts in timeseries]
+    inst = [d.get("instant", {}).get("details", {}) for d in steps]
+
+    series = {}
+    if "temp_2m" in variables:
+        series["temp_2m"] = (times, [i.get("air_temperature") for i in inst], "C")
+    if "wind_speed_10m" in variables:
+        series["wind_speed_10m"] = (times, [i.get("wind_speed") for i in inst], "m/s")
+    if "precipitation" in variables:
+        precip = [d.get("next_1_hours", {}).get("details", {}).get("precipitation_amount") for d in steps]
+        series["precipitation"] = (times, precip, "mm")
+    return forecast_frame("met_no", lat, lon, issue, series, horizons)
+
+def fetch_met_no(lat: float, lon: float, variables: list[str], horizons: Iterable[int] | None = None) -> pd.DataFrame:
     headers = {
         "User-Agent": CFG.MET_NO_USER_AGENT,
         "Accept": "application/json",
@@ -23,44 +43,12 @@ def fetch_met_no(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
         logger.warning("MET Norway fetch failed at %.3f,%.3f: %s; skipping", lat, lon, e)
         return pd.DataFrame()
     issue = now_utc()
-    timeseries = data.get("properties", {}).get("timeseries", [])
-    rows = []
-    for ts in timeseries:
-        vt = to_utc(ts["time"])
-        d = ts.get("data", {})
-        inst = d.get("instant", {}).get("details", {})
-        next1 = d.get("next_1_hours", {})
-        precip = None
-        if next1:
-            p = next1.get("details", {}).get("precipitation_amount")
-            if p is not None:
-                precip = float(p)
+    return parse_met_no(data, lat, lon, variables, issue, CFG.HORIZONS_HOURS if horizons is None else horizons)
 
-        for var in variables:
-            if var == "temp_2m" and "air_temperature" in inst:
-                v, u = normalize_value("temp_2m", float(inst["air_temperature"]), "C")
-            elif var == "wind_speed_10m" and "wind_speed" in inst:
-                v, u = normalize_value("wind_speed_10m", float(inst["wind_speed"]), "m/s")
-            elif var == "precipitation" and precip is not None:
-                v, u = normalize_value("precipitation", precip, "mm")
-            else:
-                continue
-            rows.append({
-                "source": "met_no",
-                "lat": lat, "lon": lon,
-                "variable": var, "issue_time": issue, "valid_time": vt,
-                "horizon_hours": horizon_hours(issue, vt), "value": v, "unit": u
-            })
-    return pd.DataFrame(rows)
+VENDOR = Vendor("met_no", fetch_met_no)
 
 def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        frames.append(fetch_met_no(loc["lat"], loc["lon"], CFG.VARIABLES))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    if not df.empty:
-        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
-    insert_dataframe(df, "forecasts")
+    stream_forecasts([VENDOR], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,8 @@ Docs: https://pypi.org/project/meteostat/
 """
 
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, timezone
 from meteostat import Point, Hourly
@@ -17,21 +19,76 @@ warnings.filterwarnings(
 )
 
 from src.config import CFG
-from src.utils.db_utils import insert_dataframe_dedup
+from src.etl.fetch_engine import vendor_concurrency
+from src.db.storage import insert_observations
+from src.utils.db_utils import fetch_df
 from src.utils.logging_utils import get_logger
-from src.utils.unit_utils import normalize_value
+from src.utils.unit_utils import normalize_array
 
 logger = get_logger(__name__)
 
+# Meteostat column -> (our variable, unit Meteostat reports it in)
+COLUMNS = {
+    "temp": ("temp_2m", "C"),
+    "wspd": ("wind_speed_10m", "km/h"),
+    "prcp": ("precipitation", "mm"),
+}
+
+# How far back to fetch for a location with no stored observations yet
+LOOKBACK = timedelta(days=1)
+
+WATERMARK_SQL = """
+SELECT lat, lon, MAX(obs_time) AS last_obs
+FROM observations
+WHERE source = 'meteostat' AND obs_time >= :since
+GROUP BY lat, lon
+"""
+
 
-def fetch_obs(lat: float, lon: float) -> pd.DataFrame:
+def melt_hourly(df: pd.DataFrame, lat: float, lon: float, variables: list[str], after: datetime | None = None) -> pd.DataFrame:
+    """Wide Meteostat frame (temp/wspd/prcp columns) -> observations rows, one array op per variable."""
+    times = pd.DatetimeIndex(df.index)
+    times = times.tz_localize("UTC") if times.tz is None else times.tz_convert("UTC")
+    keep_t = np.ones(len(times), dtype=bool) if after is None else np.asarray(times > pd.Timestamp(after))
+    names, units, times_out, values_out = [], [], [], []
+    for col, (variable, unit) in COLUMNS.items():
+        if variable not in variables or col not in df.columns:
+            continue
+        vals = df[col].to_numpy(dtype=float, na_value=np.nan)
+        mask = keep_t & ~np.isnan(vals)
+        n = int(mask.sum())
+        if not n:
+            continue
+        converted, canon = normalize_array(variable, vals[mask], unit)
+        names.append(np.full(n, variable, dtype=object))
+        units.append(np.full(n, canon, dtype=object))
+        times_out.append(times.tz_localize(None).to_numpy()[mask])
+        values_out.append(converted)
+    if not values_out:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "station_id": None,  # unknown/nearest selected by Meteostat Point
+        "lat": lat, "lon": lon,
+        "variable": np.concatenate(names),
+        "obs_time": pd.DatetimeIndex(np.concatenate(times_out)).tz_localize("UTC"),
+        "value": np.concatenate(values_out),
+        "unit": np.concatenate(units),
+        "source": "meteostat",
+    })
+
+
+def fetch_obs(lat: float, lon: float, since: datetime | None = None) -> pd.DataFrame:
     """
-    Fetch the last 24 hours of hourly observations near the given lat/lon.
+    Fetch hourly observations near the given lat/lon newer than `since` (UTC; default: the last 24 hours).
     Meteostat expects naive datetimes for start/end. We'll convert to UTC after fetch.
     """
     # Use naive datetimes (no tzinfo) as required by meteostat
     end = datetime.utcnow().replace(minute=0, second=0, microsecond=0)   # naive
-    start = end - timedelta(days=1)                                      # naive
+    start = end - LOOKBACK                                               # naive
+    if since is not None:
+        start = max(start, since.astimezone(timezone.utc).replace(tzinfo=None))
+        if start >= end:
+            return pd.DataFrame()
 
     p = Point(lat, lon)
 
@@ -43,67 +100,38 @@ def fetch_obs(lat: float, lon: float) -> pd.DataFrame:
         return pd.DataFrame()
 
     if df is None or df.empty:
-        logger.info("No hourly observations returned near %.3f,%.3f in the last 7 days", lat, lon)
+        logger.info("No hourly observations returned near %.3f,%.3f since %s", lat, lon, start)
         return pd.DataFrame()
 
-    rows = []
-    # Standardize timestamps to UTC-aware datetimes for DB consistency
-    # If the index is naive, we set tzinfo=UTC; if tz-aware, convert to UTC.
-    for ts, row in df.iterrows():
-        # ts may be a pandas Timestamp; handle both naive and tz-aware
-        ts_py = ts.to_pydatetime()
-        if ts_py.tzinfo is None:
-            obs_time = ts_py.replace(tzinfo=timezone.utc)
-        else:
-            obs_time = ts_py.astimezone(timezone.utc)
-
-        # Temperature (°C) → temp_2m
-        if "temp_2m" in CFG.VARIABLES and "temp" in row and pd.notna(row["temp"]):
-            v, u = normalize_value("temp_2m", float(row["temp"]), "C")
-            rows.append({
-                "station_id": None,  # unknown/nearest selected by Meteostat Point
-                "lat": lat, "lon": lon,
-                "variable": "temp_2m",
-                "obs_time": obs_time,
-                "value": v, "unit": u,
-                "source": "meteostat",
-            })
-
-        # Wind speed (typically km/h from Meteostat) → wind_speed_10m (normalized to m/s)
-        if "wind_speed_10m" in CFG.VARIABLES and "wspd" in row and pd.notna(row["wspd"]):
-            v, u = normalize_value("wind_speed_10m", float(row["wspd"]), "km/h")
-            rows.append({
-                "station_id": None,
-                "lat": lat, "lon": lon,
-                "variable": "wind_speed_10m",
-                "obs_time": obs_time,
-                "value": v, "unit": u,
-                "source": "meteostat",
-            })
-
-        # Precipitation (mm) → precipitation
-        if "precipitation" in CFG.VARIABLES and "prcp" in row and pd.notna(row["prcp"]):
-            v, u = normalize_value("precipitation", float(row["prcp"] or 0.0), "mm")
-            rows.append({
-                "station_id": None,
-                "lat": lat, "lon": lon,
-                "variable": "precipitation",
-                "obs_time": obs_time,
-                "value": v, "unit": u,
-                "source": "meteostat",
-            })
-
-    return pd.DataFrame(rows)
+    return melt_hourly(df, lat, lon, CFG.VARIABLES, after=since)
 
 
-def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        logger.info("Meteostat observations: %s", loc["name"])
-        frames.append(fetch_obs(loc["lat"], loc["lon"]))
+def load_watermarks() -> dict[tuple[float, float], datetime]:
+    """Latest stored Meteostat obs_time per location (only within the lookback window)."""
+    since = datetime.now(timezone.utc) - LOOKBACK
+    try:
+        df = fetch_df(WATERMARK_SQL, {"since": since})
+    except Exception as e:
+        logger.warning("Could not read observation watermarks (%s); fetching the full window", e)
+        return {}
+    return {(float(r.lat), float(r.lon)): r.last_obs.to_pydatetime() for r in df.itertuples(index=False)}
 
+
+def main():
+    watermarks = load_watermarks()
+    locations = CFG.TARGET_LOCATIONS
+    with ThreadPoolExecutor(max_workers=vendor_concurrency("meteostat"), thread_name_prefix="fetch-meteostat") as pool:
+        futures = [
+            pool.submit(fetch_obs, loc["lat"], loc["lon"], watermarks.get((float(loc["lat"]), float(loc["lon"]))))
+            for loc in locations
+        ]
+        frames = [f.result() for f in futures]
+
+    frames = [f for f in frames if not f.empty]
     df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    inserted = insert_dataframe_dedup(df, "observations", ["lat", "lon", "variable", "obs_time", "source"])
+    logger.info("Meteostat: %d new observation rows across %d location(s) (%d with a watermark)",
+                len(df), len(locations), len(watermarks))
+    inserted = insert_observations(df)
     logger.info("Inserted %d observation rows", inserted)
 
 
@@ -2,69 +2,86 @@
 Open-Meteo hourly forecasts (no key). Variables: temperature_2m (C), wind_speed_10m (m/s), precipitation (mm).
 Docs: https://open-meteo.com/
 """
-import pandas as pd
 from datetime import datetime
+from typing import Iterable
+import pandas as pd
 from src.config import CFG, OPEN_METEO_URL
 from src.utils.http_utils import get_json
-from src.utils.time_utils import now_utc, to_utc, horizon_hours
-from src.utils.unit_utils import normalize_value
-from src.utils.db_utils import insert_dataframe
+from src.utils.time_utils import now_utc, to_utc_index
+from src.etl.batching import Batching
+from src.etl.fetch_engine import Vendor, stream_forecasts
+from src.etl.frames import forecast_frame
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def fetch_open_meteo(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "hourly": ",".join([
-            "temperature_2m" if "temp_2m" in variables else "",
-            "wind_speed_10m" if "wind_speed_10m" in variables else "",
-            "precipitation" if "precipitation" in variables else "",
-        ]).strip(","),
+# our variable -> (Open-Meteo hourly field, unit requested below)
+FIELDS = {
+    "temp_2m": ("temperature_2m", "C"),
+    "wind_speed_10m": ("wind_speed_10m", "m/s"),
+    "precipitation": ("precipitation", "mm"),
+}
+
+# latitude/longitude accept comma-separated lists; the response is then a list, one object per point
+MAX_BATCH_POINTS = 100
+MAX_URL_LENGTH = 4000
+
+def parse_open_meteo(data: dict, lat: float, lon: float, variables: list[str], issue: datetime, horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    """Map the `hourly` arrays straight onto columns; one array per variable."""
+    hourly = data.get("hourly", {})
+    if not hourly.get("time"):
+        return pd.DataFrame()
+    times = to_utc_index(hourly["time"])
+    series = {
+        var: (times, hourly[field], unit)
+        for var, (field, unit) in FIELDS.items()
+        if var in variables and field in hourly
+    }
+    return forecast_frame("open_meteo", lat, lon, issue, series, horizons)
+
+def _params(lats: str, lons: str, variables: list[str]) -> dict:
+    return {
+        "latitude": lats,
+        "longitude": lons,
+        "hourly": ",".join(FIELDS[v][0] for v in FIELDS if v in variables),
         "windspeed_unit": "ms",
         "precipitation_unit": "mm",
         "timezone": "UTC",
     }
-    data = get_json(OPEN_METEO_URL, params=params)
+
+def batch_request(locations: list[dict], variables: list[str]) -> tuple[str, dict]:
+    lats = ",".join(str(loc["lat"]) for loc in locations)
+    lons = ",".join(str(loc["lon"]) for loc in locations)
+    return OPEN_METEO_URL, _params(lats, lons, variables)
+
+def fetch_open_meteo(lat: float, lon: float, variables: list[str], horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    data = get_json(OPEN_METEO_URL, params=_params(lat, lon, variables))
     issue = now_utc()
-    hourly = data.get("hourly", {})
-    times = [to_utc(t) for t in hourly.get("time", [])]
-    rows = []
+    return parse_open_meteo(data, lat, lon, variables, issue, CFG.HORIZONS_HOURS if horizons is None else horizons)
+
+def fetch_open_meteo_batch(locations: list[dict], variables: list[str], horizons: Iterable[int] | None = None) -> list[pd.DataFrame]:
+    """One request for all locations; returns one frame per location, in order."""
+    url, params = batch_request(locations, variables)
+    data = get_json(url, params=params)
+    issue = now_utc()
+    points = data if isinstance(data, list) else [data]
+    if len(points) != len(locations):
+        # failed request ({}) or an unexpected shape; don't guess which point is which
+        return [pd.DataFrame() for _ in locations]
+    horizons = CFG.HORIZONS_HOURS if horizons is None else horizons
+    return [
+        parse_open_meteo(point, loc["lat"], loc["lon"], variables, issue, horizons)
+        for loc, point in zip(locations, points)
+    ]
 
-    for i, vt in enumerate(times):
-        for var in variables:
-            if var == "temp_2m" and "temperature_2m" in hourly:
-                value = hourly["temperature_2m"][i]
-                v, u = normalize_value("temp_2m", float(value), "C")
-            elif var == "wind_speed_10m" and "wind_speed_10m" in hourly:
-                value = hourly["wind_speed_10m"][i]
-                v, u = normalize_value("wind_speed_10m", float(value), "m/s")
-            elif var == "precipitation" and "precipitation" in hourly:
-                value = hourly["precipitation"][i]
-                v, u = normalize_value("precipitation", float(value), "mm")
-            else:
-                continue
-            rows.append({
-                "source": "open_meteo",
-                "lat": lat, "lon": lon,
-                "variable": var,
-                "issue_time": issue,
-                "valid_time": vt,
-                "horizon_hours": horizon_hours(issue, vt),
-                "value": v, "unit": u,
-            })
-    return pd.DataFrame(rows)
+VENDOR = Vendor(
+    "open_meteo",
+    fetch_open_meteo,
+    Batching(fetch_open_meteo_batch, batch_request, MAX_BATCH_POINTS, MAX_URL_LENGTH),
+)
 
 def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        logger.info("Fetching Open-Meteo for %s", loc["name"])
-        frames.append(fetch_open_meteo(loc["lat"], loc["lon"], CFG.VARIABLES))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    if not df.empty:
-        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
-    insert_dataframe(df, "forecasts")
+    stream_forecasts([VENDOR], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 if __name__ == "__main__":
     main()
@@ -2,18 +2,46 @@
 OpenWeather 2.5 Forecast (free tier).
 Docs: https://openweathermap.org/forecast5
 """
+from datetime import datetime
+from typing import Iterable
 import pandas as pd
 from src.config import CFG, OPENWEATHER_URL
 from src.utils.http_utils import get_json
-from src.utils.time_utils import now_utc, to_utc, horizon_hours
-from src.utils.unit_utils import normalize_value
-from src.utils.db_utils import insert_dataframe
+from src.utils.time_utils import now_utc, to_utc_index
+from src.etl.fetch_engine import Vendor, stream_forecasts
+from src.etl.frames import forecast_frame
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 
-def fetch_openweather(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
+def _precip_3h(entry: dict) -> float:
+    precip = 0.0
+    for kind in ("rain", "snow"):
+        block = entry.get(kind)
+        if isinstance(block, dict) and "3h" in block:
+            precip += float(block["3h"])
+    return precip
+
+
+def parse_openweather(data: dict, lat: float, lon: float, variables: list[str], issue: datetime, horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    entries = [e for e in data.get("list", []) if e.get("dt") is not None]
+    if not entries:
+        return pd.DataFrame()
+    times = to_utc_index([e["dt"] for e in entries], unit="s")
+
+    series = {}
+    if "temp_2m" in variables:
+        series["temp_2m"] = (times, [e.get("main", {}).get("temp") for e in entries], "C")
+    if "wind_speed_10m" in variables:
+        series["wind_speed_10m"] = (times, [e.get("wind", {}).get("speed") for e in entries], "m/s")
+    if "precipitation" in variables:
+        # absent rain/snow blocks mean no precipitation in the 3h window
+        series["precipitation"] = (times, [_precip_3h(e) for e in entries], "mm")
+    return forecast_frame("openweather", lat, lon, issue, series, horizons)
+
+
+def fetch_openweather(lat: float, lon: float, variables: list[str], horizons: Iterable[int] | None = None) -> pd.DataFrame:
     if not CFG.OPENWEATHER_API_KEY:
         logger.warning("OPENWEATHER_API_KEY missing; skipping")
         return pd.DataFrame()
@@ -24,43 +52,14 @@ def fetch_openweather(lat: float, lon: float, variables: list[str]) -> pd.DataFr
     }
     data = get_json(OPENWEATHER_URL, params=params)
     issue = now_utc()
-    rows = []
-    for entry in data.get("list", []):
-        vt = to_utc(entry.get("dt"))
-        if vt is None:
-            continue
-        for var in variables:
-            if var == "temp_2m" and "main" in entry and "temp" in entry["main"]:
-                v, u = normalize_value("temp_2m", float(entry["main"]["temp"]), "C")
-            elif var == "wind_speed_10m" and "wind" in entry and "speed" in entry["wind"]:
-                v, u = normalize_value("wind_speed_10m", float(entry["wind"]["speed"]), "m/s")
-            elif var == "precipitation":
-                precip = 0.0
-                if isinstance(entry.get("rain"), dict) and "3h" in entry["rain"]:
-                    precip += float(entry["rain"]["3h"])
-                if isinstance(entry.get("snow"), dict) and "3h" in entry["snow"]:
-                    precip += float(entry["snow"]["3h"])
-                v, u = normalize_value("precipitation", precip, "mm")
-            else:
-                continue
-            rows.append({
-                "source": "openweather",
-                "lat": lat, "lon": lon, "variable": var,
-                "issue_time": issue, "valid_time": vt,
-                "horizon_hours": horizon_hours(issue, vt),
-                "value": v, "unit": u,
-            })
-    return pd.DataFrame(rows)
+    return parse_openweather(data, lat, lon, variables, issue, CFG.HORIZONS_HOURS if horizons is None else horizons)
+
+
+VENDOR = Vendor("openweather", fetch_openweather)
 
 
 def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        frames.append(fetch_openweather(loc["lat"], loc["lon"], CFG.VARIABLES))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    if not df.empty:
-        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
-    insert_dataframe(df, "forecasts")
+    stream_forecasts([VENDOR], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 
 if __name__ == "__main__":
@@ -2,18 +2,37 @@
 Visual Crossing Timeline API (free daily records cap).
 Doc: https://www.visualcrossing.com/resources/blog/how-do-i-get-free-weather-api-access/
 """
+from datetime import datetime
+from typing import Iterable
 import pandas as pd
-from datetime import datetime, timedelta
 from src.config import CFG, VISUAL_CROSSING_URL
 from src.utils.http_utils import get_json
-from src.utils.time_utils import now_utc, to_utc, horizon_hours
-from src.utils.unit_utils import normalize_value
-from src.utils.db_utils import insert_dataframe
+from src.utils.time_utils import now_utc, to_utc_index
+from src.etl.fetch_engine import Vendor, stream_forecasts
+from src.etl.frames import forecast_frame
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-def fetch_visual_crossing(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
+def parse_visual_crossing(data: dict, lat: float, lon: float, variables: list[str], issue: datetime, horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    days = data.get("days", [])
+    hours = [hr for d in days for hr in d.get("hours", [])]
+    if not hours:
+        return pd.DataFrame()
+    # VC returns epoch seconds; missing epochs become NaT and are dropped
+    times = to_utc_index([hr.get("datetimeEpoch") for hr in hours], unit="s")
+
+    series = {}
+    if "temp_2m" in variables:
+        series["temp_2m"] = (times, [hr.get("temp") for hr in hours], "C")
+    if "wind_speed_10m" in variables:
+        series["wind_speed_10m"] = (times, [hr.get("wspd") for hr in hours], "km/h")
+    if "precipitation" in variables:
+        # a present-but-null precip means none fell
+        series["precipitation"] = (times, [(hr["precip"] or 0.0) if "precip" in hr else None for hr in hours], "mm")
+    return forecast_frame("visual_crossing", lat, lon, issue, series, horizons)
+
+def fetch_visual_crossing(lat: float, lon: float, variables: list[str], horizons: Iterable[int] | None = None) -> pd.DataFrame:
     if not CFG.VISUAL_CROSSING_API_KEY:
         logger.warning("VISUAL_CROSSING_API_KEY missing; skipping")
         return pd.DataFrame()
@@ -25,49 +44,21 @@ def fetch_visual_crossing(lat: float, lon: float, variables: list[str]) -> pd.Da
         "include": "hours",
         "contentType": "json",
         "key": CFG.VISUAL_CROSSING_API_KEY,
-        "elements": "datetime,temp,wspd,precip",
+        "elements": "datetime,datetimeEpoch,temp,wspd,precip",
     }
     data = get_json(url, params=params)
     issue = now_utc()
     if not data:
         logger.warning("Visual Crossing returned empty response for %.3f,%.3f", lat, lon)
         return pd.DataFrame()
-    rows = []
-    ndays = len(data.get("days", []))
-    nhours = sum(len(d.get("hours", [])) for d in data.get("days", []))
-    logger.info("Visual Crossing: %d days, %d hours for %.3f,%.3f", ndays, nhours, lat, lon)
-    for day in data.get("days", []):
-        for hr in day.get("hours", []):
-            # VC returns epoch seconds; convert to UTC datetime
-            vt = to_utc(hr.get("datetimeEpoch"))
-            if vt is None:
-                continue
-            for var in variables:
-                if var == "temp_2m" and "temp" in hr:
-                    v, u = normalize_value("temp_2m", float(hr["temp"]), "C")
-                elif var == "wind_speed_10m" and "wspd" in hr:
-                    v, u = normalize_value("wind_speed_10m", float(hr["wspd"]), "km/h")
-                elif var == "precipitation" and "precip" in hr:
-                    v, u = normalize_value("precipitation", float(hr["precip"] or 0.0), "mm")
-                else:
-                    continue
-                rows.append({
-                    "source": "visual_crossing",
-                                       "lat": lat, "lon": lon, "variable": var,
-                    "issue_time": issue, "valid_time": vt,
-                    "horizon_hours": horizon_hours(issue, vt),
-                    "value": v, "unit": u,
-                })
-    return pd.DataFrame(rows)
+    days = data.get("days", [])
+    logger.info("Visual Crossing: %d days, %d hours for %.3f,%.3f", len(days), sum(len(d.get("hours", [])) for d in days), lat, lon)
+    return parse_visual_crossing(data, lat, lon, variables, issue, CFG.HORIZONS_HOURS if horizons is None else horizons)
+
+VENDOR = Vendor("visual_crossing", fetch_visual_crossing)
 
 def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        frames.append(fetch_visual_crossing(loc["lat"], loc["lon"], CFG.VARIABLES))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    if not df.empty:
-        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
-    insert_dataframe(df, "forecasts")
+    stream_forecasts([VENDOR], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 if __name__ == "__main__":
     main()
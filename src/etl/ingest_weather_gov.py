@@ -3,101 +3,191 @@ US NWS weather.gov gridpoints (only for US locations).
 Docs: https://www.weather.gov/documentation/services-web-api
 Gridpoints: https://github.com/weather-gov/api/blob/master/gridpoints.md
 """
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple
+import numpy as np
 import pandas as pd
+from sqlalchemy import text
 from src.config import CFG, WEATHER_GOV_POINTS_URL, WEATHER_GOV_GRID_URL
+from src.utils.db_utils import db_conn, fetch_df
 from src.utils.http_utils import get_json
-from src.utils.time_utils import now_utc, to_utc, horizon_hours
-from src.utils.unit_utils import normalize_value
-from src.utils.db_utils import insert_dataframe
+from src.utils.time_utils import now_utc, to_utc, to_utc_index
+from src.etl.fetch_engine import Vendor, stream_forecasts
+from src.etl.frames import forecast_frame
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+# our variable -> gridpoint property
+FIELDS = {
+    "temp_2m": "temperature",
+    "wind_speed_10m": "windSpeed",
+    "precipitation": "quantitativePrecipitation",  # mm over period if SI
+}
+
+# WMO unit codes in "uom" -> unit_utils names
+UOM_UNITS = {
+    "wmoUnit:degC": "C",
+    "wmoUnit:degF": "F",
+    "wmoUnit:km_h-1": "km/h",
+    "wmoUnit:m_s-1": "m/s",
+    "wmoUnit:mm": "mm",
+}
+DEFAULT_UNITS = {"temp_2m": "C", "wind_speed_10m": "m/s", "precipitation": "mm"}
+
+_DURATION = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?)?")
+
 def is_us(lat: float, lon: float) -> bool:
     # Rough bounding box for continental US
     return 18 <= lat <= 72 and -170 <= lon <= -50
 
-def fetch_weather_gov(lat: float, lon: float, variables: list[str]) -> pd.DataFrame:
+class Grid(NamedTuple):
+    office: str
+    x: int
+    y: int
+    resolved_at: datetime | None
+
+# lat/lon -> gridpoint is effectively static, so it lives in the locations table (src/db/schema.sql)
+# and is loaded once per process; stale entries are still served while a background refresh runs.
+_grids: dict[tuple[float, float], Grid] | None = None
+_grids_lock = threading.Lock()
+_refreshing: set[tuple[float, float]] = set()
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nws-grid-refresh")
+
+GRIDS_SQL = """
+SELECT lat, lon, nws_office, nws_grid_x, nws_grid_y, nws_resolved_at
+FROM locations
+WHERE nws_office IS NOT NULL
+"""
+
+UPSERT_GRID_SQL = """
+INSERT INTO locations (name, lat, lon, nws_office, nws_grid_x, nws_grid_y, nws_resolved_at)
+VALUES (:name, :lat, :lon, :office, :x, :y, :resolved_at)
+ON CONFLICT (lat, lon) DO UPDATE SET
+  nws_office = EXCLUDED.nws_office,
+  nws_grid_x = EXCLUDED.nws_grid_x,
+  nws_grid_y = EXCLUDED.nws_grid_y,
+  nws_resolved_at = EXCLUDED.nws_resolved_at
+"""
+
+def _load_grids() -> dict[tuple[float, float], Grid]:
+    global _grids
+    with _grids_lock:
+        if _grids is None:
+            try:
+                df = fetch_df(GRIDS_SQL)
+                _grids = {
+                    (float(r.lat), float(r.lon)): Grid(r.nws_office, int(r.nws_grid_x), int(r.nws_grid_y), to_utc(r.nws_resolved_at))
+                    for r in df.itertuples(index=False)
+                }
+            except Exception as e:
+                logger.warning("weather.gov grid cache unavailable (%s); resolving via /points", e)
+                _grids = {}
+        return _grids
+
+def _location_name(lat: float, lon: float) -> str:
+    for loc in CFG.TARGET_LOCATIONS:
+        if float(loc["lat"]) == lat and float(loc["lon"]) == lon:
+            return loc.get("name") or f"{lat},{lon}"
+    return f"{lat},{lon}"
+
+def _resolve_points(lat: float, lon: float, headers: dict) -> Grid | None:
+    meta = get_json(WEATHER_GOV_POINTS_URL.format(lat=lat, lon=lon), headers=headers)
+    props = meta.get("properties", {})
+    if not props.get("gridId"):
+        return None
+    grid = Grid(props["gridId"], int(props["gridX"]), int(props["gridY"]), now_utc())
+    _load_grids()[(lat, lon)] = grid
+    try:
+        with db_conn() as conn:
+            conn.execute(text(UPSERT_GRID_SQL), {
+                "name": _location_name(lat, lon), "lat": lat, "lon": lon,
+                "office": grid.office, "x": grid.x, "y": grid.y, "resolved_at": grid.resolved_at,
+            })
+    except Exception as e:
+        logger.warning("Could not persist weather.gov grid for %.3f,%.3f: %s", lat, lon, e)
+    return grid
+
+def _refresh(lat: float, lon: float, headers: dict) -> None:
+    try:
+        _resolve_points(lat, lon, headers)
+    finally:
+        with _grids_lock:
+            _refreshing.discard((lat, lon))
+
+def resolve_grid(lat: float, lon: float, headers: dict, force: bool = False) -> Grid | None:
+    """Gridpoint for lat/lon: cached mapping if known (refreshed in the background past NWS_GRID_TTL_DAYS)."""
+    grid = None if force else _load_grids().get((lat, lon))
+    if grid is None:
+        return _resolve_points(lat, lon, headers)
+    if grid.resolved_at is None or now_utc() - grid.resolved_at > timedelta(days=CFG.NWS_GRID_TTL_DAYS):
+        with _grids_lock:
+            start = (lat, lon) not in _refreshing
+            _refreshing.add((lat, lon))
+        if start:
+            _refresher.submit(_refresh, lat, lon, headers)
+    return grid
+
+def _duration_hours(dur: str) -> int:
+    """ISO-8601 duration like PT6H or P1DT3H -> whole hours (minimum 1)."""
+    m = _DURATION.match(dur)
+    if not m:
+        return 1
+    return max(1, int(m.group(1) or 0) * 24 + int(m.group(2) or 0))
+
+def _series(grid: dict, field: str) -> tuple[pd.DatetimeIndex, np.ndarray, list[int], str]:
+    """Split NWS "validTime" values like "2025-12-13T18:00:00+00:00/PT1H" into start times and durations."""
+    f = grid.get("properties", {}).get(field, {})
+    vals = f.get("values", []) or []
+    starts, durs = zip(*(v["validTime"].split("/") for v in vals)) if vals else ((), ())
+    times = to_utc_index(starts)
+    values = np.asarray([v["value"] for v in vals], dtype=float)
+    return times, values, [_duration_hours(d) for d in durs], f.get("uom", "")
+
+def parse_weather_gov(grid: dict, lat: float, lon: float, variables: list[str], issue: datetime, horizons: Iterable[int] | None = None) -> pd.DataFrame:
+    series = {}
+    for var in variables:
+        if var not in FIELDS:
+            continue
+        times, values, hours, uom = _series(grid, FIELDS[var])
+        if not len(times):
+            continue
+        unit = UOM_UNITS.get(uom, DEFAULT_UNITS[var])
+        if var == "precipitation":
+            # Period totals: apportion evenly over each hour of the period (PT6H -> 6 hourly values)
+            hours = np.asarray(hours)
+            values = np.repeat(np.nan_to_num(values) / hours, hours)
+            offsets = np.concatenate([np.arange(h) for h in hours])
+            times = pd.DatetimeIndex(np.repeat(times.values, hours), tz="UTC") + pd.to_timedelta(offsets, unit="h")
+        # Instantaneous fields use the period start to approximate the hourly grid; later periods win on overlap
+        s = pd.Series(values, index=times)
+        s = s[~s.index.duplicated(keep="last")]
+        series[var] = (s.index, s.to_numpy(), unit)
+    return forecast_frame("weather_gov", lat, lon, issue, series, horizons)
+
+def fetch_weather_gov(lat: float, lon: float, variables: list[str], horizons: Iterable[int] | None = None) -> pd.DataFrame:
     if not is_us(lat, lon):
         return pd.DataFrame()
     headers = {"User-Agent": CFG.NWS_USER_AGENT, "Accept": "application/geo+json"}
-    meta = get_json(WEATHER_GOV_POINTS_URL.format(lat=lat, lon=lon), headers=headers)
-    props = meta.get("properties", {})
-    office = props.get("gridId")
-    gridX = props.get("gridX")
-    gridY = props.get("gridY")
-    if not office:
+    gp = resolve_grid(lat, lon, headers)
+    if gp is None:
         return pd.DataFrame()
-    grid = get_json(WEATHER_GOV_GRID_URL.format(office=office, gridX=gridX, gridY=gridY), headers=headers, params={"units":"si"})
+    grid = get_json(WEATHER_GOV_GRID_URL.format(office=gp.office, gridX=gp.x, gridY=gp.y), headers=headers, params={"units":"si"})
+    if not grid and gp.resolved_at is not None:
+        # NWS occasionally re-grids an office; a cached mapping may now 404 — re-resolve once
+        fresh = resolve_grid(lat, lon, headers, force=True)
+        if fresh is not None and fresh[:3] != gp[:3]:
+            grid = get_json(WEATHER_GOV_GRID_URL.format(office=fresh.office, gridX=fresh.x, gridY=fresh.y), headers=headers, params={"units":"si"})
     issue = now_utc()
-    rows = []
-
-    def extract_series(field: str):
-        f = grid.get("properties", {}).get(field, {})
-        vals = f.get("values", []) or []
-        unit = f.get("uom", "")
-        return vals, unit
-
-    temp_vals, _ = extract_series("temperature")
-    wind_vals, _ = extract_series("windSpeed")
-    qpf_vals, _ = extract_series("quantitativePrecipitation")  # mm over period if SI
-
-    # Convert NWS "validTime" like "2025-12-13T18:00:00+00:00/PT1H" to (start, duration)
-    def parse_valid(vt: str):
-        t, dur = vt.split("/")
-        return to_utc(t), dur
-
-    # Build dict by start time to approximate hourly grid
-    tmap = {}
-    for v in temp_vals:
-        t, _ = parse_valid(v["validTime"])
-        tmap.setdefault(t, {})["temp_2m"] = float(v["value"]) if v["value"] is not None else None
-    for v in wind_vals:
-        t, _ = parse_valid(v["validTime"])
-        tmap.setdefault(t, {})["wind_speed_10m"] = float(v["value"]) if v["value"] is not None else None
-    for v in qpf_vals:
-        t, dur = parse_valid(v["validTime"])
-        val = float(v["value"]) if v["value"] is not None else 0.0
-        # If duration is PT1H, take directly; if longer (e.g., PT6H), apportion evenly per hour
-        hours = 1
-        if dur.startswith("PT") and dur.endswith("H"):
-            hours = int(dur[2:-1])
-        per_hour = val / hours if hours > 0 else val
-        for h in range(hours):
-            tt = to_utc(t)  # assuming continuous blocks
-            tmap.setdefault(tt, {})["precipitation"] = per_hour
-
-    for vt, vals in tmap.items():
-        for var in variables:
-            if var not in vals or vals[var] is None:
-                continue
-            if var == "temp_2m":
-                v, u = normalize_value("temp_2m", vals[var], "C")
-            elif var == "wind_speed_10m":
-                # NWS SI often returns km/h; normalize from km/h -> m/s if needed. Here assume m/s (conservative)
-                try:
-                    v, u = normalize_value("wind_speed_10m", vals[var], "m/s")
-                except Exception:
-                    v, u = normalize_value("wind_speed_10m", vals[var], "km/h")
-            else:
-                v, u = normalize_value("precipitation", vals[var], "mm")
-            rows.append({
-                "source": "weather_gov",
-                "lat": lat, "lon": lon, "variable": var,
-                "issue_time": issue, "valid_time": vt,
-                "horizon_hours": horizon_hours(issue, vt),
-                "value": v, "unit": u,
-            })
-    return pd.DataFrame(rows)
+    return parse_weather_gov(grid, lat, lon, variables, issue, CFG.HORIZONS_HOURS if horizons is None else horizons)
+
+VENDOR = Vendor("weather_gov", fetch_weather_gov)
 
 def main():
-    frames = []
-    for loc in CFG.TARGET_LOCATIONS:
-        frames.append(fetch_weather_gov(loc["lat"], loc["lon"], CFG.VARIABLES))
-    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
-    if not df.empty:
-        df = df[df["horizon_hours"].isin(CFG.HORIZONS_HOURS)]
-    insert_dataframe(df, "forecasts")
+    stream_forecasts([VENDOR], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 if __name__ == "__main__":
     main()
@@ -1,23 +1,23 @@
-from src.etl.ingest_open_meteo import main as om
-from src.etl.ingest_met_no import main as met
-from src.etl.ingest_openweather import main as ow
-from src.etl.ingest_visual_crossing import main as vc
-from src.etl.ingest_weather_gov import main as nws
-from src.utils.db_utils import QuotaExceededError
+from src.config import CFG
+from src.etl.fetch_engine import stream_forecasts
+from src.etl.ingest_open_meteo import VENDOR as om
+from src.etl.ingest_met_no import VENDOR as met
+from src.etl.ingest_openweather import VENDOR as ow
+from src.etl.ingest_visual_crossing import VENDOR as vc
+from src.etl.ingest_weather_gov import VENDOR as nws
+from src.utils.db_utils import QuotaExceededError, job_run
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 def main():
-    om()
-    met()
-    ow()
-    vc()
-    nws()
+    # All vendor/location pairs run concurrently; rows are written in batches as results arrive
+    stream_forecasts([om, met, ow, vc, nws], CFG.TARGET_LOCATIONS, CFG.VARIABLES)
 
 if __name__ == "__main__":
     try:
-        main()
+        with job_run("ingest_forecasts"):
+            main()
     except QuotaExceededError:
         logger.warning("Skipping run — Neon data transfer quota exceeded")
         exit(0)
@@ -1,12 +1,13 @@
 from src.etl.ingest_observations_meteostat import main as meteostat_main
-from src.utils.db_utils import QuotaExceededError
+from src.utils.db_utils import QuotaExceededError, job_run
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 if __name__ == "__main__":
     try:
-        meteostat_main()
+        with job_run("ingest_observations"):
+            meteostat_main()
     except QuotaExceededError:
         logger.warning("Skipping run — Neon data transfer quota exceeded")
         exit(0)
@@ -1,18 +1,23 @@
 from src.utils.logging_utils import get_logger
-from src.utils.db_utils import QuotaExceededError
+from src.utils.db_utils import QuotaExceededError, TransferBudgetExceededError, job_run
 from src.verify.leaderboard import leaderboard
 from src.db.prune import table_row_counts
+from src.utils.query_cache import cache_stats
 
 logger = get_logger(__name__)
 
 def main() -> None:
-    counts = table_row_counts()
-    logger.info("Table row counts: %s", counts)
-
-    total = sum(counts.values())
-    logger.info("Total estimated rows: %d (~%.1f MB)", total, total * 110 / 1_000_000)
+    try:
+        counts = table_row_counts()
+        logger.info("Table row counts: %s", counts)
+        total = sum(counts.values())
+        logger.info("Total estimated rows: %d (~%.1f MB)", total, total * 110 / 1_000_000)
+    except TransferBudgetExceededError as e:
+        # the leaderboard may still be served from the query cache
+        logger.warning("Skipping row counts — %s", e)
 
     lb = leaderboard(7)
+    logger.info("Query cache: %s", cache_stats())
     if lb is None or lb.empty:
         logger.info("No leaderboard data available for the last 7 days.")
         return
@@ -21,7 +26,11 @@ def main() -> None:
 
 if __name__ == "__main__":
     try:
-        main()
+        with job_run("monitor_hourly"):
+            main()
+    except TransferBudgetExceededError as e:
+        logger.warning("Skipping run — %s", e)
+        exit(0)
     except QuotaExceededError:
         logger.warning("Skipping run — Neon data transfer quota exceeded")
         exit(0)
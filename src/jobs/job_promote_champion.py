@@ -1,12 +1,13 @@
 from src.model.promote import main as promote
-from src.utils.db_utils import QuotaExceededError
+from src.utils.db_utils import QuotaExceededError, job_run
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 if __name__ == "__main__":
     try:
-        promote()
+        with job_run("promote_champion"):
+            promote()
     except QuotaExceededError:
         logger.warning("Skipping run — Neon data transfer quota exceeded")
         exit(0)
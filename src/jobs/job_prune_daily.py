@@ -1,12 +1,13 @@
 from src.db.prune import main as prune
-from src.utils.db_utils import QuotaExceededError
+from src.utils.db_utils import QuotaExceededError, job_run
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
 if __name__ == "__main__":
     try:
-        prune()
+        with job_run("prune_daily"):
+            prune()
     except QuotaExceededError:
         logger.warning("Skipping run — Neon data transfer quota exceeded")
         exit(0)
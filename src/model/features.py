@@ -3,13 +3,28 @@ Build feature matrix for our model:
 - Vendor forecasts for same valid_time (one column per vendor per variable)
 - Lagged observations (1h, 3h, 6h) per variable
 - Calendar features (hour of day, day of week)
+
+Train and predict build every variable x horizon in one run; they pass a FeatureStore,
+which reads the forecast and observation windows once and serves each horizon from memory.
 """
 import pandas as pd
-from src.utils.db_utils import fetch_df
+from pandas.api.types import CategoricalDtype
+from src.config import CFG
+from src.utils.db_utils import fetch_df, iter_df
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
+VENDOR_KEYS = ["lat", "lon", "valid_time", "source"]
+VENDORS = ("open_meteo", "met_no", "openweather", "visual_crossing", "weather_gov")
+
+def _fold_mean(acc: pd.DataFrame | None, rows: pd.DataFrame) -> pd.DataFrame | None:
+    """Running per-key value sum/count, so the vendor mean can be built chunk by chunk."""
+    if rows.empty:
+        return acc
+    part = rows.groupby(VENDOR_KEYS, observed=True)["value"].agg(["sum", "count"])
+    return part if acc is None else acc.add(part, fill_value=0)
+
 def get_vendor_matrix(variable: str, horizon: int) -> pd.DataFrame:
     sql = """
     SELECT lat, lon, valid_time, source, value, horizon_hours
@@ -18,18 +33,27 @@ def get_vendor_matrix(variable: str, horizon: int) -> pd.DataFrame:
     AND source IN ('open_meteo','met_no','openweather','visual_crossing','weather_gov')
     AND valid_time >= now() - interval '24 hours'
     """
-    df = fetch_df(sql, {"variable": variable})
-    if df.empty:
-        return df
+    # Streamed: only per (lat, lon, valid_time, source) sums are kept, for the rows within
+    # ±1h of the horizon and for all rows (the fallback)
+    near = every = None
+    for chunk in iter_df(sql, {"variable": variable}, typed=CFG.TYPED_FRAMES):
+        near = _fold_mean(near, chunk[(chunk["horizon_hours"] - horizon).abs() <= 1])
+        every = _fold_mean(every, chunk)
+    return _vendor_wide(near, every, variable, horizon)
+
+def _vendor_wide(near: pd.DataFrame | None, every: pd.DataFrame | None, variable: str, horizon: int) -> pd.DataFrame:
+    if every is None:
+        return pd.DataFrame()
 # Try tolerant horizon filter first
-    dff = df[ (df["horizon_hours"] - horizon).abs() <= 1 ]
-    if dff.empty:
+    acc = near
+    if acc is None:
         logger.warning("No vendor rows for %s H+%d within ±1h; falling back to unfiltered", variable, horizon)
-        dff = df
+        acc = every
 
-    return dff.pivot_table(
-        index=["lat","lon","valid_time"], columns="source", values="value"
-    ).reset_index()
+    # same shape as pivot_table(index=[lat, lon, valid_time], columns=source, values=value)
+    wide = (acc["sum"] / acc["count"]).astype(acc["sum"].dtype).unstack("source")
+    wide.columns = pd.Index(wide.columns.astype(str), name="source")
+    return wide.reset_index()
 
 def get_obs_lags(variable: str, lags=(1,3,6)) -> pd.DataFrame:
     sql = """
@@ -38,10 +62,12 @@ def get_obs_lags(variable: str, lags=(1,3,6)) -> pd.DataFrame:
     WHERE variable = :variable
     AND obs_time >= now() - interval '48 hours'
     """
-    df = fetch_df(sql, {"variable": variable}).rename(columns={"obs_time":"valid_time"})
+    df = fetch_df(sql, {"variable": variable}, typed=CFG.TYPED_FRAMES).rename(columns={"obs_time":"valid_time"})
+    return _lagged(df, lags)
+
+def _lagged(df: pd.DataFrame, lags=(1,3,6)) -> pd.DataFrame:
     if df.empty: return df
-    out = df.copy()
-    out = out.sort_values(["lat","lon","valid_time"])
+    out = df.sort_values(["lat","lon","valid_time"])
     frames = [out]
     for l in lags:
         lagged = out.copy()
@@ -59,10 +85,14 @@ def calendar_features(df_index: pd.DataFrame) -> pd.DataFrame:
     df["dow"] = pd.to_datetime(df["valid_time"]).dt.dayofweek
     return df
 
-def build_features(variable: str, horizon: int) -> pd.DataFrame:
-    vend = get_vendor_matrix(variable, horizon)
+def build_features(variable: str, horizon: int, store: "FeatureStore | None" = None) -> pd.DataFrame:
+    if CFG.FEATURE_BUILDER == "sql":
+        # one pushed-down query per matrix; the store's windows are never needed
+        from src.model.features_sql import build_features_sql
+        return build_features_sql(variable, horizon)
+    vend = store.vendor_matrix(variable, horizon) if store else get_vendor_matrix(variable, horizon)
     if vend.empty: return vend
-    lags = get_obs_lags(variable)
+    lags = store.obs_lags(variable) if store else get_obs_lags(variable)
     X = vend.merge(lags, on=["lat","lon","valid_time"], how="left")
     cal = calendar_features(X[["valid_time"]].drop_duplicates()).rename(columns={"valid_time":"valid_time"})
     X = X.merge(cal, on="valid_time", how="left")
@@ -74,19 +104,19 @@ def build_features(variable: str, horizon: int) -> pd.DataFrame:
     WHERE variable = :variable
     AND obs_time >= now() - interval '48 hours'
     """
-    ydf = fetch_df(ysql, {"variable": variable})
+    ydf = store.targets(variable) if store else fetch_df(ysql, {"variable": variable}, typed=CFG.TYPED_FRAMES)
     if ydf.empty:
         return pd.DataFrame()
 
-    X = X.copy()
-    X["lat"] = X["lat"].astype(float)
-    X["lon"] = X["lon"].astype(float)
+    # merge_asof needs identical key dtypes on both sides; typed reads already give float64
+    # lat/lon and tz-aware times, so these are no-ops (no copies) on that path
+    X["lat"] = X["lat"].astype(float, copy=False)
+    X["lon"] = X["lon"].astype(float, copy=False)
     X["valid_time"] = pd.to_datetime(X["valid_time"], utc=True)
     X = X[X["valid_time"].notna()]
 
-    ydf = ydf.copy()
-    ydf["lat"] = ydf["lat"].astype(float)
-    ydf["lon"] = ydf["lon"].astype(float)
+    ydf["lat"] = ydf["lat"].astype(float, copy=False)
+    ydf["lon"] = ydf["lon"].astype(float, copy=False)
     ydf["obs_time"] = pd.to_datetime(ydf["obs_time"], utc=True)
     ydf = ydf.rename(columns={"obs_time": "valid_time"})
     ydf = ydf[ydf["valid_time"].notna()]
@@ -102,3 +132,72 @@ def build_features(variable: str, horizon: int) -> pd.DataFrame:
         tolerance=pd.Timedelta(hours=1)
     )
     return Xy
+
+
+class FeatureStore:
+    """
+    Forecast (24h) and observation (48h) windows for a set of variables, each read with one
+    query on first use and kept for the run; build_features(..., store=) then slices them
+    per variable and horizon instead of querying. Windows are as of the first read.
+    """
+    FORECASTS_SQL = """
+    SELECT variable, lat, lon, valid_time, source, value, horizon_hours
+    FROM forecasts
+    WHERE variable = ANY(:variables)
+    AND source = ANY(:sources)
+    AND valid_time >= now() - interval '24 hours'
+    """
+    OBSERVATIONS_SQL = """
+    SELECT variable, lat, lon, obs_time, value
+    FROM observations
+    WHERE variable = ANY(:variables)
+    AND obs_time >= now() - interval '48 hours'
+    """
+
+    def __init__(self, variables=None):
+        self.variables = list(variables or CFG.VARIABLES)
+        self._forecasts: dict[str, pd.DataFrame] | None = None
+        self._observations: dict[str, pd.DataFrame] | None = None
+        self._lags: dict[str, pd.DataFrame] = {}
+
+    def _load(self, sql: str, params: dict, dtype: dict) -> dict[str, pd.DataFrame]:
+        # fixed categories keep the streamed chunks' categoricals identical, so they concat as
+        # such; sorted like the categories inferred per chunk, so vendor columns come out alike
+        dtype = {"variable": CategoricalDtype(self.variables), **dtype} if CFG.TYPED_FRAMES else None
+        chunks = list(iter_df(sql, {"variables": self.variables, **params}, dtype=dtype, typed=CFG.TYPED_FRAMES))
+        if not chunks:
+            return {}
+        df = pd.concat(chunks, ignore_index=True)
+        del chunks
+        return {str(v): g.drop(columns="variable") for v, g in df.groupby("variable", observed=True)}
+
+    def forecasts(self, variable: str) -> pd.DataFrame:
+        if self._forecasts is None:
+            self._forecasts = self._load(self.FORECASTS_SQL, {"sources": list(VENDORS)}, {"source": CategoricalDtype(sorted(VENDORS))})
+            logger.info("FeatureStore: %d vendor rows for %s", sum(map(len, self._forecasts.values())), self.variables)
+        return self._forecasts.get(variable, pd.DataFrame())
+
+    def observations(self, variable: str) -> pd.DataFrame:
+        if self._observations is None:
+            self._observations = self._load(self.OBSERVATIONS_SQL, {}, {})
+            logger.info("FeatureStore: %d observation rows for %s", sum(map(len, self._observations.values())), self.variables)
+        return self._observations.get(variable, pd.DataFrame(columns=["lat", "lon", "obs_time", "value"]))
+
+    def vendor_matrix(self, variable: str, horizon: int) -> pd.DataFrame:
+        """Same frame as get_vendor_matrix(variable, horizon)."""
+        rows = self.forecasts(variable)
+        if rows.empty:
+            return pd.DataFrame()
+        near = _fold_mean(None, rows[(rows["horizon_hours"] - horizon).abs() <= 1])
+        every = near if near is not None else _fold_mean(None, rows)
+        return _vendor_wide(near, every, variable, horizon)
+
+    def obs_lags(self, variable: str) -> pd.DataFrame:
+        """Same frame as get_obs_lags(variable); the same for every horizon, so built once."""
+        if variable not in self._lags:
+            self._lags[variable] = _lagged(self.observations(variable).rename(columns={"obs_time": "valid_time"}))
+        return self._lags[variable]
+
+    def targets(self, variable: str) -> pd.DataFrame:
+        """Observations as build_features' target frame (lat, lon, obs_time, y)."""
+        return self.observations(variable).rename(columns={"value": "y"})
@@ -0,0 +1,97 @@
+"""
+SQL-pushdown variant of features.build_features (FEATURE_BUILDER=sql).
+The vendor pivot (avg ... FILTER per source), the observation lags (RANGE window frames)
+and the ±1h nearest target all run in Postgres, so one row per (lat, lon, valid_time)
+crosses the wire instead of every long-format vendor and observation row.
+
+Matches the pandas builder row for row, except that observations duplicated across
+observation sources at the same (lat, lon, obs_time) are averaged rather than each
+producing its own feature row.
+"""
+import pandas as pd
+from src.config import CFG
+from src.model.features import VENDORS
+from src.utils.db_utils import fetch_df
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+FEATURES_SQL = """
+WITH f AS (
+  SELECT lat, lon, valid_time, source, value, abs(horizon_hours - :horizon) <= 1 AS near
+  FROM forecasts
+  WHERE variable = :variable
+  AND source IN ({sources})
+  AND valid_time >= now() - interval '24 hours'
+),
+pick AS (
+  -- rows within ±1h of the horizon; every row if the variable has none
+  SELECT * FROM f WHERE near OR NOT EXISTS (SELECT 1 FROM f WHERE near)
+),
+v AS (
+  SELECT lat, lon, valid_time,
+         {pivot}
+  FROM pick
+  GROUP BY lat, lon, valid_time
+),
+o AS (
+  SELECT lat, lon, obs_time, avg(value) AS value
+  FROM observations
+  WHERE variable = :variable
+  AND obs_time >= now() - interval '48 hours'
+  GROUP BY lat, lon, obs_time
+),
+lags AS (
+  -- the observation exactly l hours before each observed hour, as the pandas self-merges do
+  SELECT lat, lon, obs_time,
+         {lag_windows}
+  FROM o
+  WINDOW w AS (PARTITION BY lat, lon ORDER BY obs_time)
+),
+target AS (
+  -- nearest observation within ±1h; ties go to the earlier one, like merge_asof
+  SELECT DISTINCT ON (v.lat, v.lon, v.valid_time) v.lat, v.lon, v.valid_time, o.value AS y
+  FROM v
+  JOIN o ON o.lat = v.lat AND o.lon = v.lon
+   AND o.obs_time BETWEEN v.valid_time - interval '1 hour' AND v.valid_time + interval '1 hour'
+  ORDER BY v.lat, v.lon, v.valid_time, abs(extract(epoch FROM o.obs_time - v.valid_time)), o.obs_time
+)
+SELECT v.*, {lag_columns}, target.y
+FROM v
+LEFT JOIN lags ON lags.lat = v.lat AND lags.lon = v.lon AND lags.obs_time = v.valid_time
+LEFT JOIN target ON target.lat = v.lat AND target.lon = v.lon AND target.valid_time = v.valid_time
+WHERE EXISTS (SELECT 1 FROM o)
+ORDER BY v.valid_time, v.lat, v.lon
+"""
+
+
+def features_sql(lags=(1, 3, 6)) -> str:
+    vendors = sorted(VENDORS)
+    return FEATURES_SQL.format(
+        sources=", ".join(f"'{s}'" for s in vendors),
+        pivot=",\n         ".join(f"avg(value) FILTER (WHERE source = '{s}') AS {s}" for s in vendors),
+        lag_windows=",\n         ".join(
+            f"max(value) OVER (w RANGE BETWEEN interval '{int(l)} hours' PRECEDING AND interval '{int(l)} hours' PRECEDING) AS obs_lag_{int(l)}h"
+            for l in lags),
+        lag_columns=", ".join(f"lags.obs_lag_{int(l)}h" for l in lags),
+    )
+
+
+def build_features_sql(variable: str, horizon: int, lags=(1, 3, 6)) -> pd.DataFrame:
+    """Same frame as features.build_features(variable, horizon), built by one query."""
+    Xy = fetch_df(features_sql(lags), {"variable": variable, "horizon": int(horizon)}, typed=CFG.TYPED_FRAMES)
+    if Xy.empty:
+        return pd.DataFrame()
+    # the pandas pivot only has columns for vendors with rows
+    Xy = Xy.drop(columns=[s for s in VENDORS if Xy[s].isna().all()])
+    # all-NULL columns arrive as object
+    value_dtype = "float32" if CFG.TYPED_FRAMES else "float64"
+    for c in Xy.columns:
+        if c in VENDORS or c.startswith("obs_lag_") or c == "y":
+            Xy[c] = Xy[c].astype(value_dtype)
+    # calendar features are derived client-side rather than transferred
+    y = Xy.pop("y")
+    Xy["hour"] = Xy["valid_time"].dt.hour
+    Xy["dow"] = Xy["valid_time"].dt.dayofweek
+    Xy["y"] = y
+    return Xy
@@ -17,8 +17,9 @@ from sklearn import set_config
 set_config(transform_output="pandas")  # keep sklearn transformer outputs as DataFrames
 
 from src.config import CFG
-from src.model.features import build_features
-from src.utils.db_utils import db_conn, insert_dataframe
+from src.model.features import FeatureStore, build_features
+from src.db.storage import write_forecasts
+from src.utils.db_utils import db_conn
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
@@ -133,7 +134,7 @@ def _predict_and_insert_stream(model, model_feat_cols, Xy: pd.DataFrame, var: st
             "unit": {"temp_2m": "C", "wind_speed_10m": "m/s", "precipitation": "mm"}[var],
         })
 
-        insert_dataframe(out, "forecasts")
+        write_forecasts(out)
         del Xb, yhat, out
         gc.collect()
 
@@ -148,6 +149,7 @@ def main():
 
     success_count = 0
     fail_count = 0
+    store = FeatureStore(CFG.VARIABLES)  # windows are read on the first champion with data
 
     for var in CFG.VARIABLES:
         for h in CFG.HORIZONS_HOURS:
@@ -156,7 +158,7 @@ def main():
                 logger.info("No champion for %s; skipping", model_name)
                 continue
 
-            Xy = build_features(var, h)
+            Xy = build_features(var, h, store)
             if Xy is None or Xy.empty:
                 continue
 
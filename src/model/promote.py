@@ -5,7 +5,7 @@ RMSE and MAE, promote it. Otherwise keep the current champion.
 """
 import json
 from sqlalchemy import text
-from src.utils.db_utils import db_conn
+from src.utils.db_utils import bump_table_version, db_conn
 from src.utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
@@ -115,6 +115,9 @@ def main():
                 logger.error("%s: promotion failed: %s", name, e)
                 errors += 1
 
+        # cached reads of models (the dashboard export) see the new champions
+        bump_table_version(conn, "models")
+
         if errors == len(names) and errors > 0:
             raise RuntimeError("All promotions failed — check DB connectivity and model data")
 
@@ -15,9 +15,9 @@ from sklearn.linear_model import LinearRegression
 from lightgbm import LGBMRegressor
 import pandas as pd
 from sqlalchemy import text
-from src.utils.db_utils import db_conn
+from src.utils.db_utils import bump_table_version, db_conn
 from src.config import CFG
-from src.model.features import build_features
+from src.model.features import FeatureStore, build_features
 from src.model.evaluate import weekly_folds, evaluate_model
 from src.utils.logging_utils import get_logger
 from mlflow.tracking import MlflowClient
@@ -36,8 +36,8 @@ def _setup_mlflow():
     mlflow.set_tracking_uri(f"https://dagshub.com/{CFG.DAGSHUB_USERNAME}/{CFG.PUBLIC_REPO_NAME}.mlflow")
     mlflow.set_experiment("weather-ensemble")
 
-def train_one(variable: str, horizon: int):
-    Xy = build_features(variable, horizon)
+def train_one(variable: str, horizon: int, store: FeatureStore | None = None):
+    Xy = build_features(variable, horizon, store)
     if Xy is None or Xy.empty:
         logger.warning("No data for %s H+%d", variable, horizon)
         return None
@@ -164,6 +164,7 @@ def train_one(variable: str, horizon: int):
                     "algo": algo,
                 })},
             )
+            bump_table_version(conn, "models")
         logger.info("Trained %s H+%d: RMSE=%.3f MAE=%.3f (run_id=%s)", variable, horizon, rmse, mae, run_id)
         return {"variable": variable, "horizon": horizon, "rmse": rmse, "mae": mae, "run_id": run_id, "features": feat, "algo": algo}
 
@@ -171,9 +172,10 @@ def train_one(variable: str, horizon: int):
 def main():
     import json
     results = []
+    store = FeatureStore(CFG.VARIABLES)  # one read of each window for all variable x horizon models
     for var in CFG.VARIABLES:
         for h in CFG.HORIZONS_HOURS:
-            r = train_one(var, h)
+            r = train_one(var, h, store)
             if r:
                 results.append(r)
 
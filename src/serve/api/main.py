@@ -1,8 +1,11 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import pandas as pd
+from src.db.storage import physical_table
 from src.utils.db_utils import fetch_df
+from src.utils.query_cache import cache_stats
 from src.verify.leaderboard import leaderboard
+from src.verify.rollups import window_errors
 
 app = FastAPI(title="Weather Forecast API", version="0.1.0")
 
@@ -18,19 +21,13 @@ def health():
 
 @app.get("/sources")
 def sources():
-    sql = """
-    SELECT source, variable, horizon_hours, avg(rmse) AS rmse, avg(mae) AS mae, avg(mape) AS mape
-    FROM errors
-    WHERE valid_time >= now() - interval '7 days'
-    GROUP BY source, variable, horizon_hours
-    """
-    df = fetch_df(sql)
+    df = window_errors(7)[["source", "variable", "horizon_hours", "rmse", "mae", "mape", "n"]]
     return {"data": df.to_dict(orient="records")}
 
 @app.get("/metrics")
 def metrics():
     lb = leaderboard(7)
-    return {"leaderboard": lb.to_dict(orient="records")}
+    return {"leaderboard": lb.to_dict(orient="records"), "query_cache": cache_stats()}
 
 @app.post("/predict")
 def predict(req: PredictRequest):
@@ -42,6 +39,7 @@ def predict(req: PredictRequest):
       AND variable = ANY(:variables) AND horizon_hours = ANY(:horizons)
       AND valid_time >= now() AT TIME ZONE 'utc' - interval '6 hours'
        """
-    df = fetch_df(sql, {"lat": req.lat, "lon": req.lon, "variables": req.variables, "horizons": req.horizons})
+    df = fetch_df(sql, {"lat": req.lat, "lon": req.lon, "variables": req.variables, "horizons": req.horizons},
+                  ttl=600, tables=[physical_table("forecasts")])
     if df.empty:
         raise HTTPException(status_code=404, detail="No predictions available yet for requested parameters")
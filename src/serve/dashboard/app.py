@@ -1,36 +1,28 @@
 import gradio as gr
 import pandas as pd
-from datetime import timedelta
 from src.verify.leaderboard import leaderboard
-from src.utils.db_utils import fetch_df
+from src.verify.rollups import hourly_rollups, pool, window_errors
 
 def load_errors(days=7):
-    sql = """
-    SELECT source, variable, horizon_hours, valid_time, mae, rmse, mape
-    FROM errors
-    WHERE valid_time >= now() - interval '7 days'
-    """
-    return fetch_df(sql)
+    # hourly rollup buckets; bucket sums pool exactly over any grouping (rollups.pool)
+    return hourly_rollups(days).rename(columns={"bucket": "valid_time"})
 
 def tab_verification():
-    df = load_errors()
-    if df.empty:
+    piv = window_errors(7)
+    if piv.empty:
         return gr.HTML("<p>No data yet. Please check back later.</p>")
-    piv = df.groupby(["variable","horizon_hours","source"]).agg({"rmse":"mean","mae":"mean"}).reset_index()
-    return piv
+    return piv[["variable","horizon_hours","source","rmse","mae"]].sort_values(["variable","horizon_hours","source"]).reset_index(drop=True)
 
 def tab_leaderboard():
     lb = leaderboard(7)
     return lb
 
 def tab_our_vs_best():
-    df = load_errors()
+    df = window_errors(7)
     if df.empty: return df
-    best = leaderboard(7).rename(columns={"source":"best_source"})
-    merged = df.merge(best[["variable","horizon_hours","best_source"]], on=["variable","horizon_hours"], how="left")
-    our = merged[merged["source"]=="our_model"].rename(columns={"rmse":"rmse_our","mae":"mae_our"})
-    bestm = merged.merge(our[["variable","horizon_hours","rmse_our","mae_our"]], on=["variable","horizon_hours"], how="left")
-    bestm = bestm[bestm["source"]==bestm["best_source"]]
+    best = leaderboard(7)
+    our = df[df["source"]=="our_model"].rename(columns={"rmse":"rmse_our","mae":"mae_our"})
+    bestm = best.merge(our[["variable","horizon_hours","rmse_our","mae_our"]], on=["variable","horizon_hours"], how="left")
     bestm["rmse_diff"] = bestm["rmse_our"] - bestm["rmse"]
     bestm["mae_diff"] = bestm["mae_our"] - bestm["mae"]
     return bestm[["variable","horizon_hours","best_source","rmse","rmse_our","rmse_diff","mae","mae_our","mae_diff"]]
@@ -38,8 +30,9 @@ def tab_our_vs_best():
 def tab_drift():
     df = load_errors()
     if df.empty: return df
-    recent = df.groupby(["variable","source"]).resample("12H", on="valid_time").rmse.mean().reset_index()
-    return recent
+    df["valid_time"] = df["valid_time"].dt.floor("12h")
+    recent = pool(df, ["variable","source","valid_time"])
+    return recent[["variable","source","valid_time","rmse"]]
 
 def app():
     with gr.Blocks(title="Weather Forecast Verification") as demo:
@@ -0,0 +1,150 @@
+"""
+Single-file HTTP cache store (SQLite, WAL) used by http_utils.get_json.
+One indexed row per key holds the response validators, expiry, size and a zlib-compressed
+payload. Total payload bytes are capped at REQUESTS_CACHE_MAX_MB with least-recently-used
+eviction. WAL mode lets thread and process pools read while one writer commits.
+"""
+import json
+import marshal
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional
+from src.config import CFG
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+"""
+
+# LRU recency is only rewritten when older than this, so hits stay read-only most of the time
+TOUCH_INTERVAL_SECONDS = 60
+
+
+def _encode(data: Any) -> tuple[str, bytes]:
+    # marshal decodes JSON-shaped data several times faster than json.loads
+    try:
+        return "marshal", zlib.compress(marshal.dumps(data))
+    except ValueError:
+        return "json", zlib.compress(json.dumps(data).encode("utf-8"))
+
+
+def _decode(codec: str, payload: bytes) -> Any:
+    raw = zlib.decompress(payload)
+    if codec == "marshal":
+        return marshal.loads(raw)
+    return json.loads(raw)
+
+
+class HttpCacheStore:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads or forked processes
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the entry for key as {data, stored_at, expires_at, etag, last_modified}, or None."""
+        row = self._conn().execute(
+            "SELECT stored_at, expires_at, accessed_at, etag, last_modified, codec, payload FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        stored_at, expires_at, accessed_at, etag, last_modified, codec, payload = row
+        try:
+            data = _decode(codec, payload)
+        except Exception as e:
+            # e.g. marshal format from a different Python version — treat as a miss
+            logger.debug("Dropping undecodable cache entry %s: %s", key[:12], e)
+            self.delete(key)
+            return None
+        now = time.time()
+        if now - accessed_at > TOUCH_INTERVAL_SECONDS:
+            self._conn().execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return {
+            "data": data,
+            "stored_at": stored_at,
+            "expires_at": expires_at,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+
+    def put(self, key: str, data: Any, expires_at: float | None = None, etag: str | None = None, last_modified: str | None = None) -> None:
+        codec, payload = _encode(data)
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, stored_at, expires_at, accessed_at, etag, last_modified, codec, size, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, now, expires_at, now, etag, last_modified, codec, len(payload), payload),
+        )
+        self.evict()
+
+    def refresh(self, key: str, expires_at: float | None, etag: str | None, last_modified: str | None) -> None:
+        """Mark an entry as revalidated (HTTP 304) without rewriting its payload."""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE entries SET stored_at = ?, accessed_at = ?, expires_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+            (now, now, expires_at, etag, last_modified, key),
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def total_bytes(self) -> int:
+        return self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the store fits in max_bytes."""
+        if self.max_bytes <= 0 or self.total_bytes() <= self.max_bytes:
+            return 0
+        cur = self._conn().execute(
+            "DELETE FROM entries WHERE key IN ("
+            " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS kept FROM entries)"
+            " WHERE kept > ?)",
+            (self.max_bytes,),
+        )
+        if cur.rowcount:
+            logger.debug("Evicted %d HTTP cache entries (budget %d bytes)", cur.rowcount, self.max_bytes)
+        return cur.rowcount
+
+
+_store: HttpCacheStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> HttpCacheStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HttpCacheStore(CFG.REQUESTS_CACHE_PATH, CFG.REQUESTS_CACHE_MAX_MB * 1024 * 1024)
+    return _store
@@ -1,8 +1,11 @@
+import io
 import os
+import threading
 import time
-from typing import Iterable, Mapping, Sequence
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator, Mapping, Sequence
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.exc import OperationalError
 from contextlib import contextmanager
@@ -12,6 +15,7 @@ from src.utils.logging_utils import get_logger
 logger = get_logger(__name__)
 
 _engine: Engine | None = None
+_engine_lock = threading.Lock()
 
 RETRY_EXCEPTIONS = (OperationalError,)
 MAX_RETRIES = 3
@@ -27,7 +31,19 @@ class QuotaExceededError(RuntimeError):
     """Raised when Neon data transfer quota is exceeded — job should exit gracefully."""
 
 
+class TransferBudgetExceededError(QuotaExceededError):
+    """Raised in low-priority jobs once today's estimated transfer reaches DAILY_TRANSFER_BUDGET_MB."""
+
+
 def get_engine() -> Engine:
+    if _engine is not None:
+        return _engine
+    # ETL fetch threads may reach the DB concurrently; build the engine exactly once
+    with _engine_lock:
+        return _get_engine_locked()
+
+
+def _get_engine_locked() -> Engine:
     global _engine
     if _engine is None:
         if not CFG.DATABASE_URL:
@@ -36,8 +52,10 @@ def get_engine() -> Engine:
             CFG.DATABASE_URL,
             pool_pre_ping=True,
             pool_recycle=3600,
-            connect_args={"connect_timeout": 30},
+            # application_name tags this job's sessions on the server side too
+            connect_args={"connect_timeout": 30, "application_name": _job_name[:63]},
         )
+        event.listen(_engine, "after_cursor_execute", _count_execute)
         # Verify connection with retries — Neon can be suspended and needs
         # a cold-start wake-up that sometimes fails on the first attempt.
         for attempt in range(1, MAX_RETRIES + 1):
@@ -63,8 +81,153 @@ def get_engine() -> Engine:
                 time.sleep(delay)
     return _engine
 
+# Transfer accounting. The driver doesn't expose wire bytes, so these are estimates: sent is
+# the statement text and parameters (plus COPY payload), received is per-message framing plus
+# ~FIELD_BYTES per returned field. Sessions are tagged with the job set by job_run.
+MESSAGE_OVERHEAD_BYTES = 64  # Parse/Bind/Execute and CommandComplete/ReadyForQuery framing
+ROW_OVERHEAD_BYTES = 7       # DataRow header
+FIELD_BYTES = 16             # 4-byte length + a typical text-encoded value
+
+USAGE_TODAY_SQL = """
+SELECT COALESCE(SUM(bytes_sent + bytes_received), 0) FROM transfer_usage
+WHERE day = (now() AT TIME ZONE 'UTC')::date
+"""
+
+SAVE_USAGE_SQL = """
+INSERT INTO transfer_usage (day, job, runs, queries, bytes_sent, bytes_received, updated_at)
+VALUES ((now() AT TIME ZONE 'UTC')::date, :job, 1, :queries, :sent, :received, now())
+ON CONFLICT (day, job) DO UPDATE SET
+  runs = transfer_usage.runs + 1,
+  queries = transfer_usage.queries + EXCLUDED.queries,
+  bytes_sent = transfer_usage.bytes_sent + EXCLUDED.bytes_sent,
+  bytes_received = transfer_usage.bytes_received + EXCLUDED.bytes_received,
+  updated_at = now()
+"""
+
+
+@dataclass
+class TransferStats:
+    queries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.bytes_sent + self.bytes_received
+
+
+_job_name = "adhoc"
+_low_priority = False
+_used_today = 0  # bytes already recorded in transfer_usage today, when a budget applies
+_transfer = TransferStats()
+_transfer_lock = threading.Lock()
+
+
+def _record_transfer(statement: str, sent: int, received: int, queries: int = 1) -> None:
+    with _transfer_lock:
+        _transfer.queries += queries
+        _transfer.bytes_sent += sent
+        _transfer.bytes_received += received
+    logger.debug("[%s] ~%d B sent, ~%d B received: %s", _job_name, sent, received, " ".join(statement.split())[:120])
+
+
+def _result_bytes(cursor) -> int:
+    if cursor.description is None or cursor.rowcount is None or cursor.rowcount < 0:
+        return MESSAGE_OVERHEAD_BYTES
+    return MESSAGE_OVERHEAD_BYTES + cursor.rowcount * (ROW_OVERHEAD_BYTES + FIELD_BYTES * len(cursor.description))
+
+
+def _params_bytes(params) -> int:
+    if params is None:
+        return 0
+    if isinstance(params, Mapping):
+        params = params.values()
+    elif not isinstance(params, (list, tuple)):
+        return 2 + len(str(params))
+    return sum(_params_bytes(p) for p in params)
+
+
+def _sent_bytes(statement: str, params) -> int:
+    # psycopg2 interpolates parameters client-side, each %(name)s becoming a quoted literal
+    if isinstance(params, (list, tuple)) and params and isinstance(params[0], (Mapping, list, tuple)):
+        return sum(_sent_bytes(statement, p) for p in params)  # executemany
+    if isinstance(params, Mapping):
+        return len(statement) - sum(len(k) + 4 for k in params) + _params_bytes(params)
+    return len(statement) + _params_bytes(params)
+
+
+def _count_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_transfer(statement, _sent_bytes(statement, parameters), _result_bytes(cursor))
+
+
+def _raw_execute(cur, sql: str, params=None) -> None:
+    """cursor.execute on a raw DBAPI connection, which the engine listener doesn't see."""
+    cur.execute(sql, params)
+    _record_transfer(sql, _sent_bytes(sql, params), _result_bytes(cur))
+
+
+def transfer_stats() -> TransferStats:
+    """Estimated transfer of this process so far."""
+    with _transfer_lock:
+        return replace(_transfer)
+
+
+def check_transfer_budget() -> None:
+    """Raise TransferBudgetExceededError if this is a low-priority job and today's budget is spent."""
+    budget = CFG.DAILY_TRANSFER_BUDGET_MB * 1024 * 1024
+    if not _low_priority or budget <= 0:
+        return
+    used = _used_today + transfer_stats().total
+    if used >= budget:
+        raise TransferBudgetExceededError(
+            f"daily transfer budget spent (~{used / 1048576:.1f} of {CFG.DAILY_TRANSFER_BUDGET_MB} MB) "
+            f"for low-priority job {_job_name}"
+        )
+
+
+def _save_run_summary(job: str, elapsed: float) -> None:
+    stats = transfer_stats()
+    logger.info(
+        "Transfer for %s: %d queries, ~%.3f MB sent, ~%.3f MB received in %.0fs",
+        job, stats.queries, stats.bytes_sent / 1048576, stats.bytes_received / 1048576, elapsed,
+    )
+    if not stats.queries:
+        return
+    try:
+        with get_engine().begin() as conn:
+            conn.execute(text(SAVE_USAGE_SQL), {"job": job, "queries": stats.queries, "sent": stats.bytes_sent, "received": stats.bytes_received})
+    except Exception as e:
+        logger.warning("Could not record transfer usage for %s: %s", job, e)
+
+
+@contextmanager
+def job_run(job: str):
+    """
+    Run a job with its queries tagged as `job`; on exit log and add the run's estimated transfer
+    to transfer_usage. In jobs listed in LOW_PRIORITY_JOBS, the next query raises
+    TransferBudgetExceededError once today's usage reaches DAILY_TRANSFER_BUDGET_MB, leaving
+    the rest of the quota to the ETL and predict jobs.
+    """
+    global _job_name, _low_priority, _used_today
+    _job_name, _low_priority = job, job in CFG.LOW_PRIORITY_JOBS
+    if _low_priority and CFG.DAILY_TRANSFER_BUDGET_MB > 0:
+        try:
+            with get_engine().connect() as conn:
+                _used_today = int(conn.execute(text(USAGE_TODAY_SQL)).scalar())
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            logger.warning("transfer_usage unavailable (%s); no transfer budget for %s", e, job)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _save_run_summary(job, time.perf_counter() - started)
+
+
 @contextmanager
 def db_conn():
+    check_transfer_budget()
     eng = get_engine()
     with eng.begin() as conn:
         yield conn
@@ -74,32 +237,220 @@ def insert_dataframe(df: pd.DataFrame, table: str, dtype: Mapping | None = None,
     if df.empty:
         logger.info("No rows to insert into %s", table)
         return 0
-    df.to_sql(table, get_engine(), if_exists="append", index=False, dtype=dtype, chunksize=chunksize, method="multi")
+    with db_conn() as conn:
+        df.to_sql(table, conn, if_exists="append", index=False, dtype=dtype, chunksize=chunksize, method="multi")
+        bump_table_version(conn, table)
     logger.info("Inserted %d rows into %s", len(df), table)
     return len(df)
 
 
-def insert_dataframe_dedup(df: pd.DataFrame, table: str, conflict_cols: list[str], chunksize: int = 1000):
-    """Insert via temp table with ON CONFLICT DO NOTHING to skip duplicates."""
+def _copy_sql(table: str, columns: Sequence[str]) -> str:
+    cols = ", ".join(columns)
+    return f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT csv)"
+
+
+def _csv_chunks(df: pd.DataFrame, chunksize: int) -> Iterable[io.StringIO]:
+    # NaN/None become unquoted empty fields, which COPY ... CSV reads as NULL
+    for start in range(0, len(df), chunksize):
+        buf = io.StringIO()
+        df.iloc[start:start + chunksize].to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        yield buf
+
+
+BUMP_VERSION_SQL = """
+INSERT INTO table_versions (table_name, version, updated_at) VALUES (%s, 1, now())
+ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1, updated_at = now()
+"""
+
+_has_versions: bool | None = None
+
+
+def _versions_enabled(cur) -> bool:
+    # table_versions arrives with schema.sql; writers keep working against older schemas
+    global _has_versions
+    if _has_versions is None:
+        _raw_execute(cur, "SELECT to_regclass('table_versions') IS NOT NULL")
+        _has_versions = bool(cur.fetchone()[0])
+    return _has_versions
+
+
+def _bump_versions(cur, tables: Iterable[str]) -> None:
+    """Invalidate cached fetch_df results that read these tables (see query_cache.py)."""
+    if _versions_enabled(cur):
+        for table in tables:
+            _raw_execute(cur, BUMP_VERSION_SQL, (table,))
+
+
+def bump_table_version(conn, *tables: str) -> None:
+    """_bump_versions for a SQLAlchemy connection, inside the caller's write transaction."""
+    _bump_versions(conn.connection.cursor(), tables)
+
+
+def copy_dataframe(df: pd.DataFrame, table: str, dtype: Mapping | None = None, chunksize: int = 50000):
+    """
+    Bulk-append df to an existing table via COPY ... FROM STDIN (CSV), one transaction.
+    Drop-in for insert_dataframe; `dtype` is accepted for signature compatibility only —
+    COPY casts to the table's own column types.
+    """
     if df.empty:
         logger.info("No rows to insert into %s", table)
         return 0
-    eng = get_engine()
-    tmp = f"_tmp_{table}"
-    conflict_clause = ", ".join(conflict_cols)
+    check_transfer_budget()
+    sql = _copy_sql(table, list(df.columns))
+    raw = get_engine().raw_connection()
+    try:
+        with raw.cursor() as cur:
+            for buf in _csv_chunks(df, chunksize):
+                cur.copy_expert(sql, buf)
+                _record_transfer(sql, len(sql) + buf.tell(), MESSAGE_OVERHEAD_BYTES)
+            _bump_versions(cur, [table])
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    logger.info("Inserted %d rows into %s", len(df), table)
+    return len(df)
+
+
+def _staged_insert(df: pd.DataFrame, table: str, conflict_action: str, chunksize: int) -> int:
+    """
+    In one transaction: COPY df into a session-private TEMP ... ON COMMIT DROP staging
+    table, then one INSERT ... SELECT from it with the given ON CONFLICT clause.
+    """
+    check_transfer_budget()
+    stage = f"_stage_{table}"
     cols = ", ".join(df.columns)  # explicit column list avoids type mismatch with auto-increment id
-    total = 0
-    for start in range(0, len(df), chunksize):
-        chunk = df.iloc[start:start + chunksize]
-        with eng.begin() as conn:
-            chunk.to_sql(tmp, conn, if_exists="replace", index=False, method="multi")
-            result = conn.execute(
-                text(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {tmp} ON CONFLICT ({conflict_clause}) DO NOTHING"),
-            )
-            conn.execute(text(f"DROP TABLE IF EXISTS {tmp}"))
-            total += result.rowcount
+    raw = get_engine().raw_connection()
+    try:
+        with raw.cursor() as cur:
+            # only df's columns, with the target's types and none of its constraints
+            _raw_execute(cur, f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {cols} FROM {table} WITH NO DATA")
+            sql = _copy_sql(stage, list(df.columns))
+            for buf in _csv_chunks(df, chunksize):
+                cur.copy_expert(sql, buf)
+                _record_transfer(sql, len(sql) + buf.tell(), MESSAGE_OVERHEAD_BYTES)
+            _raw_execute(cur, f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} {conflict_action}")
+            total = cur.rowcount
+            _bump_versions(cur, [table])
+        raw.commit()
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+    return total
+
+def insert_dataframe_dedup(df: pd.DataFrame, table: str, conflict_cols: list[str], chunksize: int = 50000):
+    """Insert skipping rows that collide with existing ones on conflict_cols."""
+    if df.empty:
+        logger.info("No rows to insert into %s", table)
+        return 0
+    total = _staged_insert(df, table, f"ON CONFLICT ({', '.join(conflict_cols)}) DO NOTHING", chunksize)
     logger.info("Inserted %d new rows into %s (%d duplicates skipped)", total, table, len(df) - total)
     return total
 
-def fetch_df(sql: str, params: Mapping | None = None) -> pd.DataFrame:
+def upsert_dataframe(df: pd.DataFrame, table: str, conflict_cols: list[str], chunksize: int = 50000):
+    """Insert rows, overwriting the other columns of rows that collide on conflict_cols."""
+    if df.empty:
+        logger.info("No rows to upsert into %s", table)
+        return 0
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in df.columns if c not in conflict_cols)
+    total = _staged_insert(df, table, f"ON CONFLICT ({', '.join(conflict_cols)}) DO UPDATE SET {updates}", chunksize)
+    logger.info("Upserted %d rows into %s", total, table)
+    return total
+
+TABLE_VERSIONS_SQL = "SELECT table_name, version FROM table_versions WHERE table_name = ANY(:tables)"
+
+
+def table_versions(tables: Sequence[str]) -> dict[str, int]:
+    """Current version of each table; 0 for tables never bumped."""
+    if not tables:
+        return {}
+    df = pd.read_sql(text(TABLE_VERSIONS_SQL), con=get_engine(), params={"tables": list(tables)})
+    found = dict(zip(df["table_name"], df["version"].astype(int)))
+    return {t: found.get(t, 0) for t in sorted(tables)}
+
+
+# Lean dtypes for known result columns (typed reads): low-cardinality labels as categoricals,
+# measurements as float32 (the compact layout stores REAL anyway), horizons as int16.
+# lat/lon stay float64: they are merge keys and must match the stored coordinates exactly.
+SCHEMA_DTYPES = {
+    "source": "category",
+    "variable": "category",
+    "unit": "category",
+    "station_id": "category",
+    "value": "float32",
+    "y": "float32",
+    "horizon_hours": "int16",
+    "lat": "float64",
+    "lon": "float64",
+}
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the known columns of df to SCHEMA_DTYPES in place, column by column."""
+    for col in df.columns.intersection(list(SCHEMA_DTYPES)):
+        if df[col].dtype != SCHEMA_DTYPES[col]:
+            df[col] = df[col].astype(SCHEMA_DTYPES[col])
+    return df
+
+
+def fetch_df(sql: str, params: Mapping | None = None, ttl: float | None = None, tables: Sequence[str] = (), typed: bool = False) -> pd.DataFrame:
+    """
+    Run a query into a DataFrame. With QUERY_CACHE on, a `ttl` (seconds) lets the result be
+    served from the query cache while younger than ttl and while none of `tables` (the
+    tables the query reads) has been written since. `typed` maps known columns to
+    SCHEMA_DTYPES; groupbys on the categorical columns then want observed=True.
+    """
+    df = _fetch(sql, params, ttl, tables)
+    return apply_schema(df) if typed else df
+
+
+def _read(sql: str, params: Mapping | None) -> pd.DataFrame:
+    check_transfer_budget()
     return pd.read_sql(text(sql), con=get_engine(), params=params or {})
+
+
+def _fetch(sql: str, params: Mapping | None, ttl: float | None, tables: Sequence[str]) -> pd.DataFrame:
+    if not (CFG.QUERY_CACHE and ttl):
+        return _read(sql, params)
+    # imported here: the cache is opt-in and pulls in pyarrow
+    from src.utils.query_cache import cache_key, get_cache
+    cache = get_cache()
+    key = cache_key(sql, params)
+    # the version lookup is a few bytes and is not budget-checked: a low-priority job over
+    # its budget can still serve fresh cached results, only cache misses raise
+    try:
+        versions = table_versions(tables)
+    except Exception as e:
+        logger.warning("table_versions unavailable (%s); not caching query", e)
+        return _read(sql, params)
+    df = cache.get(key, ttl, versions)
+    if df is None:
+        df = _read(sql, params)
+        try:
+            cache.put(key, df, versions)
+        except Exception as e:
+            logger.warning("Query cache write failed: %s", e)
+    return df
+
+
+def iter_df(sql: str, params: Mapping | None = None, chunksize: int | None = None, dtype: Mapping | None = None, typed: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    Stream a query as DataFrames of at most `chunksize` rows (default STREAM_CHUNK_ROWS),
+    through a server-side (named) cursor, so client memory is bounded by the chunk rather
+    than the result. `dtype` is applied to every chunk, keeping column types stable even
+    for chunks where a column is all NULL; `typed` then maps known columns to SCHEMA_DTYPES
+    (each chunk's categoricals only hold the labels it saw). Aggregate as you go; don't concatenate.
+    """
+    chunksize = chunksize or CFG.STREAM_CHUNK_ROWS
+    check_transfer_budget()
+    with get_engine().connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+        for chunk in pd.read_sql(text(sql), con=conn, params=params or {}, chunksize=chunksize, dtype=dtype):
+            # FETCH round trips bypass the execute listener; count the rows they carried
+            _record_transfer(sql, 0, MESSAGE_OVERHEAD_BYTES + len(chunk) * (ROW_OVERHEAD_BYTES + FIELD_BYTES * len(chunk.columns)), queries=0)
+            yield apply_schema(chunk) if typed else chunk
+            check_transfer_budget()
@@ -1,79 +1,196 @@
+import email.utils
 import hashlib
 import json
-import os
+import threading
 import time
 from typing import Any, Dict, Optional
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from src.config import CFG
+from src.utils.cache_store import get_store
 from src.utils.logging_utils import get_logger
+from src.utils.resilience_utils import CircuitBreaker, TokenBucket
 
 logger = get_logger(__name__)
-CACHE_DIR = os.path.join(".cache", "http")
-os.makedirs(CACHE_DIR, exist_ok=True)
 
-def _cache_path(key: str) -> str:
-    return os.path.join(CACHE_DIR, f"{key}.json")
+MAX_ATTEMPTS = 6
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+def _accept_encoding() -> str:
+    # urllib3 only decodes brotli bodies when a brotli package is importable
+    for mod in ("brotli", "brotlicffi"):
+        try:
+            __import__(mod)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session with one connection pool per host (thread-safe to share)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=CFG.HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=CFG.HTTP_POOL_MAXSIZE,
+                )
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers["Accept-Encoding"] = _accept_encoding()
+                _session = s
+    return _session
+
+_buckets: dict[str, TokenBucket | None] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+_guards_lock = threading.Lock()
+
+def _bucket_from(limit) -> TokenBucket:
+    # HOST_RATE_LIMITS values are requests/minute, or {"per_minute": n, "burst": b}
+    if isinstance(limit, dict):
+        return TokenBucket(float(limit.get("per_minute", 60)) / 60.0, float(limit.get("burst", 1)))
+    return TokenBucket(float(limit) / 60.0)
+
+def _host_guards(url: str) -> tuple[TokenBucket | None, CircuitBreaker]:
+    host = urlparse(url).hostname or url
+    with _guards_lock:
+        if host not in _breakers:
+            limit = CFG.HOST_RATE_LIMITS.get(host)
+            _buckets[host] = _bucket_from(limit) if limit else None
+            _breakers[host] = CircuitBreaker(host, CFG.CIRCUIT_BREAKER_THRESHOLD, CFG.CIRCUIT_BREAKER_COOLDOWN_SECONDS)
+        return _buckets[host], _breakers[host]
+
+def breaker_states() -> dict[str, dict]:
+    """Circuit breaker state per host seen so far (for run summaries / metrics)."""
+    with _guards_lock:
+        breakers = dict(_breakers)
+    return {host: b.snapshot() for host, b in breakers.items()}
 
 def _key_from(url: str, params: Optional[dict], headers: Optional[dict]) -> str:
     s = url + "|" + json.dumps(params or {}, sort_keys=True) + "|" + json.dumps(headers or {}, sort_keys=True)
     return hashlib.sha256(s.encode()).hexdigest()
 
+def _expires_at(resp: requests.Response, ttl: int) -> float:
+    """Freshness deadline from Cache-Control max-age / Expires, falling back to ttl."""
+    now = time.time()
+    for part in resp.headers.get("Cache-Control", "").lower().split(","):
+        part = part.strip()
+        if part in ("no-cache", "no-store"):
+            return now
+        if part.startswith("max-age="):
+            try:
+                age = int(resp.headers.get("Age", "0") or 0)
+                return now + int(part[len("max-age="):]) - age
+            except ValueError:
+                break
+    expires = resp.headers.get("Expires")
+    if expires:
+        try:
+            return email.utils.parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return now + ttl
+
+def _is_fresh(entry: dict, ttl: int) -> bool:
+    if CFG.REQUESTS_CACHE_MODE == "http" and entry.get("expires_at") is not None:
+        return time.time() < entry["expires_at"]
+    return time.time() - entry["stored_at"] <= ttl
+
 def get_json(url: str, params: Optional[dict] = None, headers: Optional[dict] = None, ttl: int | None = None, timeout: int | None = None) -> Dict[str, Any]:
+    """
+    GET a JSON document through the SQLite cache store (see cache_store.py).
+    REQUESTS_CACHE_MODE=ttl serves entries younger than ttl seconds. REQUESTS_CACHE_MODE=http
+    honours Expires/Cache-Control, and once stale revalidates with If-None-Match /
+    If-Modified-Since so an unchanged document costs a 304 instead of a full download.
+    """
     ttl = ttl or CFG.REQUESTS_CACHE_TTL_SECONDS
     timeout = timeout or CFG.REQUESTS_TIMEOUT
     key = _key_from(url, params, headers)
-    path = _cache_path(key)
+    store = get_store()
 
-    # serve from cache
-    if os.path.exists(path):
-        age = time.time() - os.path.getmtime(path)
-        if age <= ttl:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                pass
+    # serve from cache (best-effort: a locked or corrupt store just means a miss)
+    try:
+        cached = store.get(key)
+    except Exception as e:
+        logger.warning("HTTP cache read failed for %s: %s", url, e)
+        cached = None
+    if cached is not None and _is_fresh(cached, ttl):
+        return cached["data"]
+
+    req_headers = dict(headers or {})
+    if CFG.REQUESTS_CACHE_MODE == "http" and cached is not None:
+        if cached.get("etag"):
+            req_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            req_headers["If-Modified-Since"] = cached["last_modified"]
 
     # backoff loop (only retry on 429 or 5xx; fail fast on 4xx auth errors)
+    bucket, breaker = _host_guards(url)
     backoff = 1.5
-    for attempt in range(6):
+    for attempt in range(MAX_ATTEMPTS):
+        # Host has been failing — skip it for the cool-down window instead of sleeping through retries
+        if not breaker.allow():
+            logger.debug("Circuit open for %s; skipping GET %s", breaker.name, url)
+            return {}
+        if bucket is not None:
+            bucket.acquire()
         try:
-            resp = requests.get(url, params=params, headers=headers, timeout=timeout)
+            resp = get_session().get(url, params=params, headers=req_headers, timeout=timeout)
+
+            # Not modified — the cached body is still current; extend its freshness
+            if resp.status_code == 304 and cached is not None:
+                breaker.record_success()
+                try:
+                    store.refresh(key, _expires_at(resp, ttl), resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                except Exception as e:
+                    logger.warning("HTTP cache refresh failed for %s: %s", url, e)
+                return cached["data"]
+
+            # 304 without a cached body (e.g. evicted meanwhile): the host answered, nothing to return
+            if resp.status_code == 304:
+                breaker.record_success()
+                logger.warning("GET %s returned 304 with no cached entry; skipping", url)
+                return {}
 
             # Fail fast on 401/403 — retrying won't fix bad credentials
+            # (the host answered, so this still settles a half-open trial)
             if resp.status_code in (401, 403):
+                breaker.record_success()
                 logger.warning("GET %s returned %d (check API key); skipping", url, resp.status_code)
                 return {}
 
+            # Other 4xx are request errors — retrying (or blaming the host) won't help
+            if 400 <= resp.status_code < 500 and resp.status_code != 429:
+                breaker.record_success()
+                logger.warning("GET %s returned %d; skipping", url, resp.status_code)
+                return {}
+
             # Retry on 429 or 5xx
             if resp.status_code == 429 or 500 <= resp.status_code < 600:
                 raise requests.HTTPError(f"HTTP {resp.status_code}: {resp.text[:200]}")
 
             resp.raise_for_status()
             data = resp.json()
+            breaker.record_success()
 
             # Write to cache (best-effort)
             try:
-                with open(path, "w", encoding="utf-8") as f:
-                    json.dump(data, f)
-            except Exception:
-                pass
+                store.put(key, data, _expires_at(resp, ttl), resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            except Exception as e:
+                logger.warning("HTTP cache write failed for %s: %s", url, e)
 
             return data
 
-        except requests.HTTPError as e:
-            # Only hit for retriable statuses (429/5xx) — backoff and retry
-            sleep = backoff ** attempt
-            logger.warning(
-                "GET %s failed (attempt %d): %s; sleeping %.1fs",
-                url,
-                attempt + 1,
-                str(e),
-                sleep,
-            )
-            time.sleep(sleep)
         except Exception as e:
-            # Connection errors, timeouts — backoff and retry
+            # Retriable statuses (429/5xx), connection errors, timeouts — backoff and retry
+            breaker.record_failure()
+            if breaker.state == CircuitBreaker.OPEN:
+                return {}
             sleep = backoff ** attempt
             logger.warning(
                 "GET %s failed (attempt %d): %s; sleeping %.1fs",
@@ -85,5 +202,5 @@ def get_json(url: str, params: Optional[dict] = None, headers: Optional[dict] =
             time.sleep(sleep)
 
     # All retries exhausted — return empty so one vendor can't break the pipeline
-    logger.warning("GET %s failed after %d attempts; returning empty", url, 6)
+    logger.warning("GET %s failed after %d attempts; returning empty", url, MAX_ATTEMPTS)
     return {}
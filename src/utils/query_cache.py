@@ -0,0 +1,164 @@
+"""
+Opt-in result cache for db_utils.fetch_df (QUERY_CACHE=true), keyed by SQL text and params.
+Results live in a small in-process LRU and as zstd Parquet files under QUERY_CACHE_DIR, so
+the dashboard, API, monitor and export processes share them. An entry is served while it is
+younger than the caller's TTL and the table_versions of the tables the query reads are the
+ones it was stored with; writers bump those versions (db_utils) in their write transaction.
+Without pyarrow only the in-memory layer is used.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Mapping, Optional
+import pandas as pd
+from src.config import CFG
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow ships with mlflow; memory-only without it
+    pa = pq = None
+
+META_KEY = b"query_cache"
+
+
+def cache_key(sql: str, params: Optional[Mapping]) -> str:
+    payload = json.dumps([" ".join(sql.split()), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    def __init__(self, directory: str, max_bytes: int, memory_entries: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[dict, pd.DataFrame]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0}
+        if pq is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def _count(self, name: str, nbytes: int = 0) -> None:
+        with self._lock:
+            self.stats[name] += 1
+            self.stats["bytes_saved"] += nbytes
+
+    def _read_disk(self, key: str) -> Optional[tuple[dict, pd.DataFrame]]:
+        if pq is None or not os.path.exists(self._path(key)):
+            return None
+        table = pq.read_table(self._path(key))
+        meta = json.loads(table.schema.metadata[META_KEY])
+        return meta, table.to_pandas()
+
+    def get(self, key: str, ttl: float, versions: dict[str, int]) -> Optional[pd.DataFrame]:
+        """Cached result for key if fresh and stored against the same table versions, else None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        layer = "memory_hits"
+        if entry is None:
+            layer = "disk_hits"
+            try:
+                entry = self._read_disk(key)
+            except Exception as e:
+                logger.debug("Dropping unreadable query cache entry %s: %s", key[:12], e)
+                self.delete(key)
+                entry = None
+        if entry is None:
+            self._count("misses")
+            return None
+        meta, df = entry
+        if time.time() - meta["stored_at"] > ttl or meta["versions"] != versions:
+            self._count("misses")
+            return None
+        if layer == "disk_hits":
+            self._remember(key, entry)
+        self._count(layer, meta["nbytes"])
+        # callers are free to mutate what they get back
+        return df.copy()
+
+    def _remember(self, key: str, entry: tuple[dict, pd.DataFrame]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key: str, df: pd.DataFrame, versions: dict[str, int]) -> None:
+        meta = {"stored_at": time.time(), "versions": versions, "nbytes": int(df.memory_usage(deep=True).sum())}
+        df = df.copy()
+        self._remember(key, (meta, df))
+        if pq is None:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: json.dumps(meta).encode()})
+        # write-then-rename so concurrent readers never see a partial file
+        tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Drop the least recently written files until the directory fits in max_bytes."""
+        if self.max_bytes <= 0:
+            return 0
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".parquet"):
+                st = os.stat(os.path.join(self.directory, name))
+                files.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = dict(self.stats)
+        lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+        out["hit_rate"] = round((out["memory_hits"] + out["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return out
+
+
+_cache: QueryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> QueryCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryCache(CFG.QUERY_CACHE_DIR, CFG.QUERY_CACHE_MAX_MB * 1024 * 1024, CFG.QUERY_CACHE_MEMORY_ENTRIES)
+    return _cache
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of this process; bytes_saved approximates result bytes not re-fetched."""
+    return get_cache().snapshot() if _cache is not None else {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0, "hit_rate": 0.0}
@@ -0,0 +1,104 @@
+"""
+Per-host request throttling and failure isolation for the HTTP layer:
+- TokenBucket: client-side rate limit matching a vendor's published quota
+- CircuitBreaker: after N consecutive failures, short-circuit calls for a cool-down window
+"""
+import threading
+import time
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, up to `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; open -> half_open once `cooldown`
+    seconds pass, letting a single trial call through; the trial's outcome closes or re-opens it.
+    A trial whose outcome is never recorded stops blocking after `trial_timeout` seconds
+    (default: cooldown), when the next call becomes the trial.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, threshold: int, cooldown: float, trial_timeout: float | None = None):
+        self.name = name
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.trial_timeout = cooldown if trial_timeout is None else trial_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.short_circuited = 0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self._transition(self.HALF_OPEN)
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and (
+                not self._trial_in_flight or time.monotonic() - self._trial_started >= self.trial_timeout
+            ):
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "short_circuited": self.short_circuited}
+
+    def _transition(self, state: str) -> None:
+        # caller holds the lock
+        if state == self.OPEN:
+            logger.warning(
+                "Circuit OPEN for %s after %d consecutive failures; short-circuiting for %.0fs",
+                self.name, self.failures, self.cooldown,
+            )
+        else:
+            logger.info("Circuit %s for %s", state.upper(), self.name)
+        self.state = state
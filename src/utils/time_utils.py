@@ -1,5 +1,12 @@
 from datetime import datetime, timezone
+from typing import Sequence
 from dateutil import parser
+import numpy as np
+import pandas as pd
+
+# UTC designators seen in vendor timestamps: MET Norway "...Z", weather.gov "...+00:00".
+# Open-Meteo (timezone=UTC) sends naive "YYYY-MM-DDTHH:MM", which is UTC as well.
+UTC_SUFFIXES = ("Z", "+00:00")
 
 def now_utc() -> datetime:
     """Return current UTC datetime (aware)."""
@@ -17,6 +24,39 @@ def to_utc(dt) -> datetime | None:
         return dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
+def _fast_iso(values: Sequence[str]) -> pd.DatetimeIndex | None:
+    """NumPy's C ISO-8601 parser for a uniform UTC layout; None when the batch doesn't qualify."""
+    first = values[0]
+    if not isinstance(first, str):
+        return None
+    suffix = next((s for s in UTC_SUFFIXES if first.endswith(s)), "")
+    try:
+        if suffix:
+            if not all(v.endswith(suffix) for v in values):
+                return None
+            values = [v[:-len(suffix)] for v in values]
+        elif any(v[-6:].startswith(("+", "-")) for v in values):
+            return None  # non-UTC offsets need real tz handling
+        return pd.DatetimeIndex(np.array(values, dtype="datetime64[ns]")).tz_localize("UTC")
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+def to_utc_index(values: Sequence, unit: str | None = None) -> pd.DatetimeIndex:
+    """
+    Batch to_utc: parse a whole array of ISO-8601 strings (or epoch numbers with unit="s")
+    into a tz-aware UTC DatetimeIndex in one call. Naive strings are taken as UTC;
+    missing or unparseable entries become NaT.
+    """
+    if len(values) == 0:
+        return pd.DatetimeIndex([], tz="UTC")
+    if unit is not None:
+        return pd.to_datetime(np.asarray(values, dtype=float), unit=unit, utc=True, errors="coerce")
+    fast = _fast_iso(values)
+    if fast is not None:
+        return fast
+    # per-element: with format="ISO8601" a naive entry inherits the offset of the one before it
+    return pd.DatetimeIndex(pd.to_datetime(values, format="mixed", utc=True, errors="coerce"))
+
 def floor_hour(dt: datetime) -> datetime:
     dt = to_utc(dt)
     return dt.replace(minute=0, second=0, microsecond=0)
@@ -24,3 +64,12 @@ def floor_hour(dt: datetime) -> datetime:
 def horizon_hours(issue_time: datetime, valid_time: datetime) -> int:
     delta = to_utc(valid_time) - to_utc(issue_time)
     return int(round(delta.total_seconds() / 3600))
+
+def horizon_hours_array(issue_time: datetime, valid_times: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Vectorized horizon_hours: whole hours from issue_time to each valid time (same
+    round-half-to-even as the scalar version). Returned as float so NaT stays NaN;
+    cast with astype(int) after masking.
+    """
+    delta = pd.DatetimeIndex(valid_times) - pd.Timestamp(to_utc(issue_time))
+    return np.rint((delta / pd.Timedelta(hours=1)).to_numpy(dtype=float))
@@ -1,43 +1,71 @@
-from typing import Literal, Optional
+from typing import Literal, Optional, TypeVar
+import numpy as np
+import pandas as pd
+from src.config import UNIT_MAP
 
 Variable = Literal["temp_2m", "wind_speed_10m", "precipitation"]
+ArrayLike = TypeVar("ArrayLike", np.ndarray, pd.Series)
+
+# Every supported conversion is affine: canonical = value * scale + offset
+TEMP_UNITS = {
+    **dict.fromkeys(("C", "°C", "celsius"), (1.0, 0.0)),
+    **dict.fromkeys(("K", "kelvin"), (1.0, -273.15)),
+    **dict.fromkeys(("F", "°F", "fahrenheit"), (5.0 / 9.0, -32.0 * 5.0 / 9.0)),
+}
+WIND_UNITS = {
+    **dict.fromkeys(("m/s", "mps"), (1.0, 0.0)),
+    **dict.fromkeys(("km/h", "kmh", "kph"), (1.0 / 3.6, 0.0)),
+    "mph": (0.44704, 0.0),
+    **dict.fromkeys(("kt", "knot", "knots"), (0.514444, 0.0)),
+}
+PRECIP_UNITS = {
+    "mm": (1.0, 0.0),
+    "cm": (10.0, 0.0),
+    "m": (1000.0, 0.0),
+    **dict.fromkeys(("in", "inch", "inches"), (25.4, 0.0)),
+}
+AFFINE = {
+    "temp_2m": (TEMP_UNITS, "temp"),
+    "wind_speed_10m": (WIND_UNITS, "wind"),
+    "precipitation": (PRECIP_UNITS, "precip"),
+}
+
+def coefficients(variable: Variable, src_unit: Optional[str]) -> tuple[float, float, str]:
+    """Return (scale, offset, canonical_unit) converting src_unit to UNIT_MAP[variable]."""
+    if variable not in AFFINE:
+        raise ValueError(f"Unsupported variable: {variable}")
+    table, kind = AFFINE[variable]
+    unit = src_unit or UNIT_MAP[variable]
+    if unit not in table:
+        raise ValueError(f"Unsupported {kind} unit: {unit}")
+    scale, offset = table[unit]
+    return scale, offset, UNIT_MAP[variable]
+
+def _convert(x: float, table: dict, unit: str, kind: str) -> float:
+    if unit not in table:
+        raise ValueError(f"Unsupported {kind} unit: {unit}")
+    scale, offset = table[unit]
+    return x * scale + offset
 
 def to_celsius(x: float, unit: str) -> float:
-    if unit in ("C", "°C", "celsius"):
-               return x
-    if unit in ("K", "kelvin"):
-        return x - 273.15
-    if unit in ("F", "°F", "fahrenheit"):
-        return (x - 32.0) * 5.0 / 9.0
-    raise ValueError(f"Unsupported temp unit: {unit}")
+    return _convert(x, TEMP_UNITS, unit, "temp")
 
 def to_mps(x: float, unit: str) -> float:
-    if unit in ("m/s", "mps"):
-        return x
-    if unit in ("km/h", "kmh", "kph"):
-        return x / 3.6
-    if unit in ("mph",):
-        return x * 0.44704
-    if unit in ("kt", "knot", "knots"):
-        return x * 0.514444
-    raise ValueError(f"Unsupported wind unit: {unit}")
+    return _convert(x, WIND_UNITS, unit, "wind")
 
 def to_mm(x: float, unit: str) -> float:
-    if unit in ("mm",):
-        return x
-    if unit in ("cm",):
-        return x * 10.0
-    if unit in ("m",):
-        return x * 1000.0
-    if unit in ("in", "inch", "inches"):
-        return x * 25.4
-    raise ValueError(f"Unsupported precip unit: {unit}")
+    return _convert(x, PRECIP_UNITS, unit, "precip")
+
+def normalize_array(variable: Variable, values: ArrayLike, src_unit: Optional[str]) -> tuple[ArrayLike, str]:
+    """Vectorized normalize_value: convert a NumPy array or pandas Series in one affine step."""
+    scale, offset, unit = coefficients(variable, src_unit)
+    if not isinstance(values, pd.Series):
+        values = np.asarray(values, dtype=float)
+    if scale == 1.0 and offset == 0.0:
+        return values, unit
+    return values * scale + offset, unit
 
 def normalize_value(variable: Variable, value: float, src_unit: Optional[str]) -> tuple[float, str]:
     """Return (value_SI, unit_SI) for variable."""
-    if variable == "temp_2m":
-        return to_celsius(value, src_unit or "C"), "C"
-    if variable == "wind_speed_10m":
-        return to_mps(value, src_unit or "m/s"), "m/s"
-    if variable == "precipitation":
-        return to_mm(value, src_unit or "mm"), "mm"
+    scale, offset, unit = coefficients(variable, src_unit)
+    return value * scale + offset, unit
@@ -1,48 +1,67 @@
 """
 Join forecasts with observations by (lat, lon, variable, valid_time == obs_time).
-Compute MAE, RMSE, MAPE per source/horizon/variable per valid hour.
+Compute MAE, RMSE, MAPE per source/horizon/variable per valid hour, and roll them up
+into the hourly/daily error buckets (src/verify/rollups.py).
 """
 import pandas as pd
-from sqlalchemy import text
-from src.utils.db_utils import fetch_df, insert_dataframe
+from src.utils.db_utils import copy_dataframe, iter_df
 from src.utils.logging_utils import get_logger
+from src.verify.rollups import update_rollups
 
 logger = get_logger(__name__)
 
+# The window starts on an hour boundary so every hourly rollup bucket it touches is complete
 SQL_JOIN = """
 WITH f AS (
   SELECT source, lat, lon, variable, valid_time, horizon_hours, value AS f_value
   FROM forecasts
-  WHERE valid_time >= now() - interval '24 hours'
+  WHERE valid_time >= date_trunc('hour', now() - interval '24 hours')
 ),
 o AS (
   SELECT lat, lon, variable, obs_time AS valid_time, value AS o_value
   FROM observations
-  WHERE obs_time >= now() - interval '24 hours'
+  WHERE obs_time >= date_trunc('hour', now() - interval '24 hours')
 )
 SELECT f.source, f.variable, f.valid_time, f.horizon_hours, f.f_value, o.o_value
 FROM f JOIN o
 ON f.lat=o.lat AND f.lon=o.lon AND f.variable=o.variable AND f.valid_time=o.valid_time
 """
 
+KEYS = ["source", "variable", "valid_time", "horizon_hours"]
+PAIR_DTYPES = {"f_value": "float64", "o_value": "float64", "horizon_hours": "int64"}
+
+def _partial_sums(pairs: pd.DataFrame) -> pd.DataFrame:
+    err = pairs["f_value"] - pairs["o_value"]
+    return pd.DataFrame({
+        **{k: pairs[k] for k in KEYS},
+        "n": 1,
+        "sum_abs": err.abs(),
+        "sum_sq": err ** 2,
+        "sum_ape": err.abs() / (pairs["o_value"].abs() + 1e-6),
+    }).groupby(KEYS, as_index=False).sum()
+
 def compute():
-    df = fetch_df(SQL_JOIN)
-    if df.empty:
+    # Stream the pairs and fold each chunk into per-group sums: memory follows the number
+    # of (source, variable, valid_time, horizon) groups, not the number of pairs
+    acc = None
+    for chunk in iter_df(SQL_JOIN, dtype=PAIR_DTYPES):
+        part = _partial_sums(chunk)
+        acc = part if acc is None else pd.concat([acc, part]).groupby(KEYS, as_index=False).sum()
+    if acc is None or acc.empty:
         logger.info("No forecast-observation pairs yet")
         return pd.DataFrame()
-    grp = df.groupby(["source","variable","valid_time","horizon_hours"])
-    out = grp.apply(lambda g: pd.Series({
-        "mae": (g["f_value"] - g["o_value"]).abs().mean(),
-        "rmse": ((g["f_value"] - g["o_value"])**2).mean() ** 0.5,
-        "mape": ( (g["f_value"] - g["o_value"]).abs() / (g["o_value"].abs() + 1e-6) ).mean(),
-        "n": len(g),
-    }), include_groups=False).reset_index()
+    out = acc[KEYS].copy()
+    out["mae"] = acc["sum_abs"] / acc["n"]
+    out["rmse"] = (acc["sum_sq"] / acc["n"]) ** 0.5
+    out["mape"] = acc["sum_ape"] / acc["n"]
+    out["n"] = acc["n"].astype(int)
     return out
 
 def main():
     df = compute()
     if not df.empty:
-               insert_dataframe(df, "errors")
+        copy_dataframe(df, "errors")
+        update_rollups(df)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+"""
+Hourly and daily error rollups per (source, variable, horizon_hours, bucket).
+Buckets store the pair count and sums of absolute, squared and absolute-percentage error,
+so any set of buckets pools exactly (RMSE included) and readers scan buckets, not rows.
+compute_errors replaces the hourly buckets it recomputes, then rebuilds the daily buckets
+of the days they fall in from the hourly ones.
+
+An existing errors table can be rolled up once with:
+
+    python -m src.verify.rollups --backfill
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from src.utils.db_utils import bump_table_version, db_conn, fetch_df, upsert_dataframe
+from src.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+KEY = ["source", "variable", "horizon_hours", "bucket"]
+SUMS = ["n", "sum_abs", "sum_sq", "sum_ape"]
+ROLLUP_TABLES = ("error_rollup_hourly", "error_rollup_daily")
+# Readers may serve cached results this long (QUERY_CACHE); a rollup write invalidates them sooner
+CACHE_TTL_SECONDS = 3600
+
+REFRESH_DAILY_SQL = """
+INSERT INTO error_rollup_daily (source, variable, horizon_hours, bucket, n, sum_abs, sum_sq, sum_ape, updated_at)
+SELECT source, variable, horizon_hours, date_trunc('day', bucket AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+       SUM(n), SUM(sum_abs), SUM(sum_sq), SUM(sum_ape), now()
+FROM error_rollup_hourly
+WHERE bucket >= :lo AND bucket < :hi
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (source, variable, horizon_hours, bucket) DO UPDATE SET
+  n = EXCLUDED.n, sum_abs = EXCLUDED.sum_abs, sum_sq = EXCLUDED.sum_sq,
+  sum_ape = EXCLUDED.sum_ape, updated_at = EXCLUDED.updated_at
+"""
+
+# Whole UTC days of the window from the daily rollup, the partial first day from the hourly one
+WINDOW_SQL = """
+WITH w AS (
+  SELECT date_trunc('hour', now() - interval '1 day' * :days) AS since,
+         date_trunc('day', (now() - interval '1 day' * :days) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + interval '1 day' AS first_day
+),
+b AS (
+  SELECT h.source, h.variable, h.horizon_hours, h.n, h.sum_abs, h.sum_sq, h.sum_ape
+  FROM error_rollup_hourly h, w WHERE h.bucket >= w.since AND h.bucket < w.first_day
+  UNION ALL
+  SELECT d.source, d.variable, d.horizon_hours, d.n, d.sum_abs, d.sum_sq, d.sum_ape
+  FROM error_rollup_daily d, w WHERE d.bucket >= w.first_day
+)
+SELECT source, variable, horizon_hours,
+       SUM(n) AS n, SUM(sum_abs) AS sum_abs, SUM(sum_sq) AS sum_sq, SUM(sum_ape) AS sum_ape
+FROM b
+GROUP BY source, variable, horizon_hours
+"""
+
+HOURLY_SQL = """
+SELECT source, variable, horizon_hours, bucket, n, sum_abs, sum_sq, sum_ape
+FROM error_rollup_hourly
+WHERE bucket >= date_trunc('hour', now() - interval '1 day' * :days)
+"""
+
+# errors holds one row per (source, variable, valid_time, horizon) per compute run that
+# covered it; the latest one reflects all observations that arrived
+BACKFILL_SQL = """
+INSERT INTO error_rollup_hourly (source, variable, horizon_hours, bucket, n, sum_abs, sum_sq, sum_ape, updated_at)
+SELECT source, variable, horizon_hours, date_trunc('hour', valid_time),
+       SUM(n), SUM(mae * n), SUM(rmse * rmse * n), SUM(mape * n), now()
+FROM (
+  SELECT DISTINCT ON (source, variable, valid_time, horizon_hours) source, variable, valid_time, horizon_hours, mae, rmse, mape, n
+  FROM errors
+  WHERE n > 0
+  ORDER BY source, variable, valid_time, horizon_hours, created_at DESC
+) latest
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (source, variable, horizon_hours, bucket) DO UPDATE SET
+  n = EXCLUDED.n, sum_abs = EXCLUDED.sum_abs, sum_sq = EXCLUDED.sum_sq,
+  sum_ape = EXCLUDED.sum_ape, updated_at = EXCLUDED.updated_at
+"""
+
+
+def hourly_sums(errors: pd.DataFrame) -> pd.DataFrame:
+    """Hourly rollup rows from compute_errors output (per-valid-time mae/rmse/mape/n)."""
+    n = errors["n"].astype(float)
+    df = pd.DataFrame({
+        "source": errors["source"],
+        "variable": errors["variable"],
+        "horizon_hours": errors["horizon_hours"],
+        "bucket": pd.to_datetime(errors["valid_time"], utc=True).dt.floor("h"),
+        "n": errors["n"],
+        "sum_abs": errors["mae"] * n,
+        "sum_sq": errors["rmse"] ** 2 * n,
+        "sum_ape": errors["mape"] * n,
+    })
+    out = df.groupby(KEY, as_index=False)[SUMS].sum()
+    out["updated_at"] = datetime.now(timezone.utc)
+    return out
+
+
+def refresh_daily(lo: datetime, hi: datetime) -> int:
+    """Rebuild the daily buckets of the UTC days from lo through hi from the hourly rollup."""
+    lo = datetime.combine(lo.astimezone(timezone.utc).date(), datetime.min.time(), timezone.utc)
+    hi = datetime.combine(hi.astimezone(timezone.utc).date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    with db_conn() as conn:
+        bump_table_version(conn, "error_rollup_daily")
+        return conn.execute(text(REFRESH_DAILY_SQL), {"lo": lo, "hi": hi}).rowcount
+
+
+def update_rollups(errors: pd.DataFrame) -> int:
+    """
+    Replace the hourly buckets covered by a compute_errors run and refresh their days.
+    Each run sees every pair of the hours it covers, so replacing is idempotent.
+    """
+    if errors.empty:
+        return 0
+    hourly = hourly_sums(errors)
+    written = upsert_dataframe(hourly, "error_rollup_hourly", KEY)
+    days = refresh_daily(hourly["bucket"].min().to_pydatetime(), hourly["bucket"].max().to_pydatetime())
+    logger.info("Updated %d hourly and %d daily error buckets", written, days)
+    return written
+
+
+def pool(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Pool bucket sums over keys into n, mae, rmse, mape."""
+    g = df.groupby(keys, as_index=False)[SUMS].sum()
+    g = g[g["n"] > 0]
+    n = g["n"].astype(float)
+    g["mae"] = g["sum_abs"] / n
+    g["rmse"] = np.sqrt(g["sum_sq"] / n)
+    g["mape"] = g["sum_ape"] / n
+    g["n"] = g["n"].astype(int)
+    return g[keys + ["mae", "rmse", "mape", "n"]].reset_index(drop=True)
+
+
+def window_errors(days: int = 7) -> pd.DataFrame:
+    """Pooled metrics per source/variable/horizon over the last `days` days."""
+    keys = ["source", "variable", "horizon_hours"]
+    df = fetch_df(WINDOW_SQL, {"days": int(days)}, ttl=CACHE_TTL_SECONDS, tables=ROLLUP_TABLES)
+    if df.empty:
+        return pd.DataFrame(columns=keys + ["mae", "rmse", "mape", "n"])
+    return pool(df, keys)
+
+
+def hourly_rollups(days: int = 7) -> pd.DataFrame:
+    """Hourly bucket sums over the last `days` days, for time-resolved views."""
+    return fetch_df(HOURLY_SQL, {"days": int(days)}, ttl=CACHE_TTL_SECONDS, tables=("error_rollup_hourly",))
+
+
+def backfill() -> None:
+    """Build the rollups from everything already in errors."""
+    with db_conn() as conn:
+        bump_table_version(conn, "error_rollup_hourly")
+        hours = conn.execute(text(BACKFILL_SQL)).rowcount
+        bounds = conn.execute(text("SELECT MIN(bucket), MAX(bucket) FROM error_rollup_hourly")).one()
+    days = refresh_daily(*bounds) if bounds[0] is not None else 0
+    logger.info("Backfilled %d hourly and %d daily error buckets", hours, days)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Error rollup maintenance")
+    ap.add_argument("--backfill", action="store_true", help="roll up all existing errors rows")
+    args = ap.parse_args()
+    if args.backfill:
+        backfill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from src.etl.batching import Batching, plan_batches, request_url
+
+URL = "https://api.example.com/forecast"
+
+
+def locations(n: int) -> list[dict]:
+    return [{"lat": 40.0 + i / 1000, "lon": -74.0 - i / 1000} for i in range(n)]
+
+
+def request(locs: list[dict], variables: list[str]) -> tuple[str, dict]:
+    return URL, {
+        "latitude": ",".join(f"{l['lat']:.3f}" for l in locs),
+        "longitude": ",".join(f"{l['lon']:.3f}" for l in locs),
+        "hourly": ",".join(variables),
+    }
+
+
+def batching(max_points: int, max_url_length: int = 0) -> Batching:
+    return Batching(fetch=lambda locs, variables: [], request=request, max_points=max_points, max_url_length=max_url_length)
+
+
+def test_respects_max_points_and_keeps_order():
+    locs = locations(7)
+    batches = plan_batches(locs, ["temp_2m"], batching(max_points=3))
+    assert [len(b) for b in batches] == [3, 3, 1]
+    assert [l for b in batches for l in b] == locs
+
+
+def test_respects_max_url_length():
+    locs = locations(20)
+    limit = len(request_url(*request(locs[:4], ["temp_2m"])))
+    batches = plan_batches(locs, ["temp_2m"], batching(max_points=100, max_url_length=limit))
+    assert [len(b) for b in batches] == [4] * 5
+    assert all(len(request_url(*request(b, ["temp_2m"]))) <= limit for b in batches)
+
+
+def test_both_limits_apply():
+    locs = locations(10)
+    limit = len(request_url(*request(locs[:4], ["temp_2m"])))
+    batches = plan_batches(locs, ["temp_2m"], batching(max_points=3, max_url_length=limit))
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+def test_single_location_over_url_limit_still_gets_a_batch():
+    locs = locations(2)
+    batches = plan_batches(locs, ["temp_2m"], batching(max_points=10, max_url_length=10))
+    assert batches == [[locs[0]], [locs[1]]]
+
+
+def test_empty_and_nonpositive_max_points():
+    assert plan_batches([], ["temp_2m"], batching(max_points=5)) == []
+    assert [len(b) for b in plan_batches(locations(3), ["temp_2m"], batching(max_points=0))] == [1, 1, 1]
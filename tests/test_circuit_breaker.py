@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from src.utils import http_utils, resilience_utils
+from src.utils.resilience_utils import CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(resilience_utils, "time", SimpleNamespace(monotonic=c))
+    return c
+
+
+def open_breaker(clock, **kwargs) -> CircuitBreaker:
+    b = CircuitBreaker("api.example.com", threshold=2, cooldown=60, **kwargs)
+    b.record_failure()
+    b.record_failure()
+    assert b.state == CircuitBreaker.OPEN
+    return b
+
+
+def test_opens_after_threshold_and_short_circuits(clock):
+    b = CircuitBreaker("api.example.com", threshold=3, cooldown=60)
+    b.record_failure()
+    b.record_failure()
+    assert b.state == CircuitBreaker.CLOSED and b.allow()
+    b.record_failure()
+    assert b.state == CircuitBreaker.OPEN
+    assert not b.allow()
+    assert b.snapshot()["short_circuited"] == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    b = open_breaker(clock)
+    clock.now += 60
+    assert b.allow()
+    assert b.state == CircuitBreaker.HALF_OPEN
+    assert not b.allow()
+
+
+def test_trial_success_closes(clock):
+    b = open_breaker(clock)
+    clock.now += 60
+    assert b.allow()
+    b.record_success()
+    assert b.state == CircuitBreaker.CLOSED and b.failures == 0
+    assert b.allow()
+
+
+def test_trial_failure_reopens(clock):
+    b = open_breaker(clock)
+    clock.now += 60
+    assert b.allow()
+    b.record_failure()
+    assert b.state == CircuitBreaker.OPEN
+    assert not b.allow()
+    clock.now += 60
+    assert b.allow()
+
+
+def test_stuck_trial_expires(clock):
+    b = open_breaker(clock, trial_timeout=30)
+    clock.now += 60
+    assert b.allow()  # trial whose outcome is never recorded
+    clock.now += 29
+    assert not b.allow()
+    clock.now += 1
+    assert b.allow()
+    assert b.state == CircuitBreaker.HALF_OPEN
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: dict | None = None):
+        self.status_code = status
+        self.headers = {}
+        self.text = ""
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class NoCache:
+    def get(self, key):
+        return None
+
+    def put(self, *args):
+        pass
+
+
+@pytest.fixture
+def half_open(clock, monkeypatch):
+    """A half-open breaker guarding get_json, and a setter for the next response status."""
+    b = open_breaker(clock)
+    clock.now += 60
+    response = {}
+    session = SimpleNamespace(get=lambda *a, **k: response["next"])
+    monkeypatch.setattr(http_utils, "get_store", NoCache)
+    monkeypatch.setattr(http_utils, "get_session", lambda: session)
+    monkeypatch.setattr(http_utils, "_host_guards", lambda url: (None, b))
+    return b, lambda status, body=None: response.__setitem__("next", FakeResponse(status, body))
+
+
+def test_get_json_2xx_settles_trial(half_open):
+    b, respond = half_open
+    respond(200, {"ok": 1})
+    assert http_utils.get_json("https://api.example.com/v1") == {"ok": 1}
+    assert b.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_get_json_4xx_settles_trial(half_open, status):
+    b, respond = half_open
+    respond(status)
+    assert http_utils.get_json("https://api.example.com/v1") == {}
+    assert b.state == CircuitBreaker.CLOSED
+    assert b.allow()
+
+
+def test_get_json_5xx_reopens(half_open):
+    b, respond = half_open
+    respond(503)
+    assert http_utils.get_json("https://api.example.com/v1") == {}
+    assert b.state == CircuitBreaker.OPEN
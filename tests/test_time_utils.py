@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.time_utils import to_utc, to_utc_index
+
+
+def utc(*stamps: str) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(list(stamps)).tz_localize("UTC")
+
+
+def test_z_suffix():
+    idx = to_utc_index(["2025-01-01T00:00:00Z", "2025-01-01T01:00:00Z"])
+    assert idx.equals(utc("2025-01-01 00:00", "2025-01-01 01:00"))
+
+
+def test_plus_zero_offset_and_naive_are_utc():
+    assert to_utc_index(["2025-01-01T00:00:00+00:00"]).equals(utc("2025-01-01 00:00"))
+    assert to_utc_index(["2025-01-01T00:00", "2025-01-01T01:00"]).equals(utc("2025-01-01 00:00", "2025-01-01 01:00"))
+
+
+def test_mixed_offsets():
+    idx = to_utc_index(["2025-01-01T00:00:00+02:00", "2025-01-01T00:00:00-05:00", "2025-01-01T03:00:00Z"])
+    assert idx.equals(utc("2024-12-31 22:00", "2025-01-01 05:00", "2025-01-01 03:00"))
+
+
+@pytest.mark.parametrize("values", [
+    ["2025-01-01T00:00:00-05:00", "2025-01-01T03:00"],
+    ["2025-01-01T03:00", "2025-01-01T00:00:00-05:00"],
+])
+def test_naive_entries_among_offsets_stay_utc(values):
+    idx = to_utc_index(values)
+    assert idx.equals(pd.DatetimeIndex([to_utc(v) for v in values]))
+
+
+def test_epoch_units():
+    assert to_utc_index([1735689600, 1735693200], unit="s").equals(utc("2025-01-01 00:00", "2025-01-01 01:00"))
+    assert to_utc_index([1735689600000], unit="ms").equals(utc("2025-01-01 00:00"))
+    idx = to_utc_index([1735689600, None, np.nan], unit="s")
+    assert idx[0] == pd.Timestamp("2025-01-01", tz="UTC") and idx[1:].isna().all()
+
+
+@pytest.mark.parametrize("values", [
+    ["2025-01-01T00:00", "garbage", None],
+    ["2025-01-01T00:00Z", "not a time"],
+    ["2025-01-01T00:00+01:00", ""],
+])
+def test_bad_entries_become_nat(values):
+    idx = to_utc_index(values)
+    assert str(idx.tz) == "UTC"
+    assert idx[0] == pd.Timestamp(to_utc(values[0]))
+    assert idx[1:].isna().all()
+
+
+def test_empty():
+    idx = to_utc_index([])
+    assert len(idx) == 0 and str(idx.tz) == "UTC"